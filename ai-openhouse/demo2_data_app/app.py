@@ -1,6 +1,15 @@
+import csv
+import io
+
 import streamlit as st
 import pandas as pd
 import numpy as np
+import pyarrow as pa
+
+try:
+    import polars as pl
+except ImportError:  # optional: faster overview on wide CSVs
+    pl = None
 
 st.set_page_config(page_title="Demo 2: Data to Insight (Local)", layout="wide")
 st.title("Demo 2: From Data to Insight (Local)")
@@ -9,17 +18,58 @@ st.caption("Upload a CSV and explore patterns locally. No data leaves this compu
 # -----------------------------
 # Helpers
 # -----------------------------
-def safe_read_csv(uploaded_file) -> pd.DataFrame:
-    """Attempt to read CSV robustly with a couple fallbacks."""
+# Streamlit reruns this whole script on every widget change, so anything derived
+# only from the uploaded data is memoized with st.cache_data.
+
+def _read_header(file_bytes: bytes, encoding: str) -> list:
+    # Just the first CSV record; the wrapper decodes lazily, not the whole upload
+    text = io.TextIOWrapper(io.BytesIO(file_bytes), encoding=encoding, newline="")
+    return next(csv.reader(text), [])
+
+def _dedupe_columns(names) -> list:
+    # Rename repeated headers a, a.1, a.2, ... (and blank ones "Unnamed: i") like the C engine does
+    names = [name or f"Unnamed: {i}" for i, name in enumerate(names)]
+    counts: dict = {}
+    for i, col in enumerate(names):
+        old_col = col
+        cur_count = counts.get(col, 0)
+        while cur_count > 0:
+            counts[old_col] = cur_count + 1
+            col = f"{old_col}.{cur_count}"
+            cur_count = cur_count + 1 if col in names else counts.get(col, 0)
+        names[i] = col
+        counts[col] = cur_count + 1
+    return names
+
+def _read_csv_arrow(file_bytes: bytes, encoding: str = "utf-8") -> pd.DataFrame:
+    # Multi-threaded Arrow parser; string columns stay Arrow-backed instead of object.
+    kwargs = {}
+    header = _read_header(file_bytes, encoding)
+    if len(set(header)) < len(header):
+        # Arrow would infer one type across same-named columns: name them apart up front
+        kwargs = {"header": None, "skiprows": 1, "names": _dedupe_columns(header)}
+    return pd.read_csv(io.BytesIO(file_bytes), engine="pyarrow", dtype_backend="pyarrow", encoding=encoding, **kwargs)
+
+@st.cache_data(show_spinner=False)
+def safe_read_csv(file_bytes: bytes) -> pd.DataFrame:
+    """Attempt to read CSV robustly with a couple fallbacks (cached on the raw bytes)."""
     try:
-        return pd.read_csv(uploaded_file)
-    except UnicodeDecodeError:
-        # Common fallback encodings in higher-ed exports
-        uploaded_file.seek(0)
-        return pd.read_csv(uploaded_file, encoding="latin-1")
+        try:
+            df = _read_csv_arrow(file_bytes)
+            # Arrow does not raise on invalid UTF-8; it types those columns as binary instead.
+            retry = any(isinstance(t, pd.ArrowDtype) and pa.types.is_binary(t.pyarrow_dtype) for t in df.dtypes)
+        except UnicodeDecodeError:  # raised by _read_header
+            retry = True
+        if retry:
+            # Common fallback encodings in higher-ed exports
+            df = _read_csv_arrow(file_bytes, encoding="latin-1")
     except Exception as e:
         raise RuntimeError(f"Could not read CSV: {e}")
 
+    # Basic cleanup: avoid exploding on column name weirdness
+    df.columns = [str(c) for c in df.columns]
+    return df
+
 def infer_column_roles(df: pd.DataFrame):
     numeric_cols = df.select_dtypes(include=["number"]).columns.tolist()
     non_numeric_cols = [c for c in df.columns if c not in numeric_cols]
@@ -33,54 +83,121 @@ def infer_column_roles(df: pd.DataFrame):
 
     return numeric_cols, non_numeric_cols, likely_cat_numeric
 
-def top_correlations(df: pd.DataFrame, numeric_cols: list[str], top_n: int = 10):
+def build_overview(df: pd.DataFrame, na_col_frac: pd.Series) -> pd.DataFrame:
+    """Per-column type / missingness / unique-count table."""
+    if pl is not None:
+        # One multi-threaded pass over the (zero-copy) Arrow columns instead of N nunique calls
+        uniq = pl.from_pandas(df).lazy().select(pl.all().drop_nulls().n_unique()).collect().row(0)
+    else:
+        uniq = df.nunique(dropna=True).values
+    return pd.DataFrame({
+        "Column": df.columns,
+        "Detected type": df.dtypes.astype(str).values,
+        "Missing (%)": (na_col_frac * 100).values,
+        "Unique values": uniq,
+    }).sort_values(by="Missing (%)", ascending=False)
+
+@st.cache_data(show_spinner=False)
+def compute_metadata(df: pd.DataFrame) -> dict:
+    """Everything derived from the frame alone, so Streamlit hashes df once per rerun."""
+    na_col_frac = df.isna().mean()
+    numeric_cols, non_numeric_cols, likely_cat_numeric = infer_column_roles(df)
+    return {
+        "na_col_frac": na_col_frac,
+        "overall_missing": float(na_col_frac.mean()),
+        "numeric_cols": numeric_cols,
+        "non_numeric_cols": non_numeric_cols,
+        "likely_cat_numeric": likely_cat_numeric,
+        "overview": build_overview(df, na_col_frac),
+        # Pre-converted Arrow tables skip the pandas -> Arrow step st.dataframe does each rerun
+        "preview": pa.Table.from_pandas(df.head(50)),
+    }
+
+@st.cache_data(show_spinner=False)
+def top_correlations(df: pd.DataFrame, numeric_cols: tuple[str, ...], top_n: int = 10):
     if len(numeric_cols) < 2:
         return pd.DataFrame(columns=["Variable A", "Variable B", "Abs Correlation"])
 
-    corr = df[numeric_cols].corr(numeric_only=True).abs()
-    # Take upper triangle (no self-correlations)
-    upper = corr.where(np.triu(np.ones(corr.shape), k=1).astype(bool))
-    pairs = (
-        upper.stack()
-        .sort_values(ascending=False)
-        .head(top_n)
-        .reset_index()
-        .rename(columns={"level_0": "Variable A", "level_1": "Variable B", 0: "Abs Correlation"})
-    )
-    return pairs
+    corr = df[list(numeric_cols)].corr(numeric_only=True)
+    names = corr.columns.to_numpy()
+    # Take upper triangle (no self-correlations), skipping undefined (NaN) pairs
+    iu, ju = np.triu_indices(len(names), k=1)
+    abs_vals = np.abs(corr.to_numpy(dtype="float64", na_value=np.nan)[iu, ju])
+    keep = np.flatnonzero(~np.isnan(abs_vals))
+    if keep.size > top_n:
+        keep = keep[np.argpartition(-abs_vals[keep], top_n - 1)[:top_n]]
+    # Strongest first; ties keep matrix order
+    keep = keep[np.lexsort((keep, -abs_vals[keep]))]
+    return pd.DataFrame({
+        "Variable A": names[iu[keep]],
+        "Variable B": names[ju[keep]],
+        "Abs Correlation": abs_vals[keep],
+    })
+
+def histogram_counts(values: np.ndarray, bins: int) -> pd.Series:
+    """Counts per equal-width bin, indexed by each bin's lower edge."""
+    counts, edges = np.histogram(values, bins=bins)
+    return pd.Series(counts, index=pd.Index(edges[:-1], name="bin start"), name="count")
+
+def group_summary(df: pd.DataFrame, y: str, g: str) -> pd.DataFrame:
+    """count/mean/median/std/min/max of y per group g, largest groups first."""
+    if pl is not None:
+        # One multi-threaded group_by pass for all six aggregates
+        col = pl.col(y)
+        summary = (
+            pl.from_pandas(df[[y, g]]).lazy()
+            .drop_nulls()
+            .group_by(g)
+            .agg(col.count().alias("count"), col.mean().alias("mean"), col.median().alias("median"),
+                 col.std().alias("std"), col.min().alias("min"), col.max().alias("max"))
+            .sort(g)
+            .collect()
+            .to_pandas()
+        )
+    else:
+        grp = df.groupby(g, dropna=True, observed=True)[y]
+        summary = grp.agg(["count", "mean", "median", "std", "min", "max"]).reset_index()
+        summary = summary[summary["count"] > 0]  # groups whose y values are all missing
+    return summary.sort_values("count", ascending=False, kind="stable")
 
 def distribution_flags(series: pd.Series) -> list[str]:
     flags = []
-    s = series.dropna()
-    if len(s) < 3:
+    # One NaN-stripped float array shared by every check below
+    arr = series.to_numpy(dtype="float64", na_value=np.nan)
+    arr = arr[~np.isnan(arr)]
+    n = arr.size
+    if n < 3:
         return flags
 
-    # Simple skewness warning
-    try:
-        skew = float(s.skew())
+    # Simple skewness warning (bias-adjusted, same estimate as pandas' Series.skew)
+    dev = arr - arr.mean()
+    m2 = np.mean(dev ** 2)
+    if m2 > 0:
+        skew = float(np.sqrt(n * (n - 1)) / (n - 2) * np.mean(dev ** 3) / m2 ** 1.5)
         if abs(skew) >= 1.0:
             flags.append(f"Skewed distribution (skew ≈ {skew:.2f})")
-    except Exception:
-        pass
 
     # Outlier-ish flag: large max/min relative to IQR
-    try:
-        q1, q3 = s.quantile(0.25), s.quantile(0.75)
-        iqr = q3 - q1
-        if iqr > 0:
-            lower = q1 - 3 * iqr
-            upper = q3 + 3 * iqr
-            outliers = ((s < lower) | (s > upper)).mean()
-            if outliers >= 0.02:
-                flags.append(f"Notable outliers (≈ {outliers*100:.1f}% beyond 3×IQR)")
-    except Exception:
-        pass
+    q1, q3 = np.percentile(arr, [25, 75])
+    iqr = q3 - q1
+    if iqr > 0:
+        lower = q1 - 3 * iqr
+        upper = q3 + 3 * iqr
+        outliers = np.count_nonzero((arr < lower) | (arr > upper)) / n
+        if outliers >= 0.02:
+            flags.append(f"Notable outliers (≈ {outliers*100:.1f}% beyond 3×IQR)")
 
     return flags
 
-def make_plain_language_summary(df: pd.DataFrame, numeric_cols: list[str], non_numeric_cols: list[str]) -> str:
+def make_plain_language_summary(
+    df: pd.DataFrame,
+    numeric_cols: list[str],
+    non_numeric_cols: list[str],
+    na_col_frac: pd.Series,
+    overall_missing: float,
+) -> str:
     n_rows, n_cols = df.shape
-    overall_missing = df.isna().mean().mean() * 100
+    overall_missing = overall_missing * 100
 
     parts = []
     parts.append(f"This dataset contains **{n_rows:,} rows** and **{n_cols} columns**.")
@@ -89,7 +206,7 @@ def make_plain_language_summary(df: pd.DataFrame, numeric_cols: list[str], non_n
     if numeric_cols:
         parts.append(f"It includes **{len(numeric_cols)} numeric** variable(s) and **{len(non_numeric_cols)} non-numeric** variable(s).")
         # Call out high-missing numeric columns
-        high_missing = df[numeric_cols].isna().mean().sort_values(ascending=False)
+        high_missing = na_col_frac[numeric_cols].sort_values(ascending=False)
         if len(high_missing) > 0 and high_missing.iloc[0] >= 0.30:
             worst = high_missing.head(3)
             worst_str = ", ".join([f"{idx} ({val*100:.0f}%)" for idx, val in worst.items()])
@@ -99,29 +216,31 @@ def make_plain_language_summary(df: pd.DataFrame, numeric_cols: list[str], non_n
 
     return " ".join(parts)
 
-def caution_flags(df: pd.DataFrame, numeric_cols: list[str]) -> list[str]:
+def caution_flags(
+    df: pd.DataFrame,
+    numeric_cols: list[str],
+    na_col_frac: pd.Series,
+    overall_missing: float,
+) -> list[str]:
     flags = []
     n_rows = df.shape[0]
     if n_rows < 50:
         flags.append("Small sample size (< 50 rows). Patterns may be unstable.")
 
     # Overall missingness
-    overall_missing = df.isna().mean().mean()
     if overall_missing >= 0.10:
         flags.append(f"Missing data is non-trivial (overall ≈ {overall_missing*100:.1f}%).")
 
     # Columns with very high missingness
-    high_missing_cols = df.columns[df.isna().mean() >= 0.30].tolist()
+    high_missing_cols = na_col_frac.index[na_col_frac >= 0.30].tolist()
     if high_missing_cols:
         flags.append("Some columns have ≥ 30% missing values: " + ", ".join(high_missing_cols[:8]) + ("…" if len(high_missing_cols) > 8 else ""))
 
     # Very low variance numeric columns
     if numeric_cols:
-        low_var = []
-        for c in numeric_cols:
-            s = df[c].dropna()
-            if len(s) >= 3 and float(s.std()) == 0.0:
-                low_var.append(c)
+        stds = df[numeric_cols].std(numeric_only=True)
+        counts = df[numeric_cols].count()
+        low_var = stds.index[(stds == 0.0) & (counts >= 3)].tolist()
         if low_var:
             flags.append("Some numeric columns have zero variance (all values identical): " + ", ".join(low_var[:8]) + ("…" if len(low_var) > 8 else ""))
 
@@ -147,21 +266,23 @@ if not uploaded:
 
 # Read data
 try:
-    df = safe_read_csv(uploaded)
+    df = safe_read_csv(uploaded.getvalue())
 except Exception as e:
     st.error(str(e))
     st.stop()
 
-# Basic cleanup: avoid exploding on column name weirdness
-df.columns = [str(c) for c in df.columns]
-
-numeric_cols, non_numeric_cols, likely_cat_numeric = infer_column_roles(df)
+meta = compute_metadata(df)
+na_col_frac = meta["na_col_frac"]
+overall_missing = meta["overall_missing"]
+numeric_cols = meta["numeric_cols"]
+non_numeric_cols = meta["non_numeric_cols"]
+likely_cat_numeric = meta["likely_cat_numeric"]
 
 # -----------------------------
 # Top preview
 # -----------------------------
 st.subheader("Preview")
-st.dataframe(df.head(50), use_container_width=True)
+st.dataframe(meta["preview"], use_container_width=True)
 
 # -----------------------------
 # 1) Dataset Overview
@@ -172,16 +293,16 @@ c1, c2, c3, c4 = st.columns(4)
 c1.metric("Rows", f"{df.shape[0]:,}")
 c2.metric("Columns", f"{df.shape[1]:,}")
 c3.metric("Numeric cols", f"{len(numeric_cols):,}")
-c4.metric("Avg missing (%)", f"{df.isna().mean().mean()*100:.1f}")
+c4.metric("Avg missing (%)", f"{overall_missing*100:.1f}")
 
 with st.expander("Column types and missingness", expanded=True):
-    overview = pd.DataFrame({
-        "Column": df.columns,
-        "Detected type": [str(df[c].dtype) for c in df.columns],
-        "Missing (%)": (df.isna().mean() * 100).round(1).values,
-        "Unique values": [df[c].nunique(dropna=True) for c in df.columns],
-    }).sort_values(by="Missing (%)", ascending=False)
-    st.dataframe(overview, use_container_width=True)
+    overview = meta["overview"]
+    st.dataframe(
+        overview,
+        use_container_width=True,
+        # Rounded for display in the browser; the data stays full precision
+        column_config={"Missing (%)": st.column_config.NumberColumn(format="%.1f")},
+    )
 
     if likely_cat_numeric:
         st.caption(
@@ -198,7 +319,7 @@ colA, colB = st.columns([2, 1])
 
 with colA:
     if len(numeric_cols) >= 2:
-        corr_pairs = top_correlations(df, numeric_cols, top_n=10)
+        corr_pairs = top_correlations(df, tuple(numeric_cols), top_n=10)
         if corr_pairs.empty:
             st.write("No correlations available (insufficient numeric data).")
         else:
@@ -255,11 +376,12 @@ if numeric_cols:
         col = v1.selectbox("Numeric column", numeric_cols)
         bins = v2.slider("Bins", min_value=5, max_value=60, value=20, step=5)
 
-        s = df[col].dropna()
-        if s.empty:
+        values = df[col].to_numpy(dtype="float64", na_value=np.nan)
+        values = values[np.isfinite(values)]
+        if values.size == 0:
             st.warning("No data available for that column.")
         else:
-            hist = pd.cut(s, bins=bins).value_counts().sort_index()
+            hist = histogram_counts(values, bins)
             st.bar_chart(hist)
 
     else:  # Box (by group)
@@ -270,9 +392,7 @@ if numeric_cols:
             g = v2.selectbox("Group by", group_options)
 
             # For a simple box-like view without extra libs, show per-group summary stats
-            grp = df[[y, g]].dropna().groupby(g)[y]
-            summary = grp.agg(["count", "mean", "median", "std", "min", "max"]).reset_index()
-            summary = summary.sort_values("count", ascending=False)
+            summary = group_summary(df, y, g)
 
             st.write("**Per-group summary (a boxplot-style view via stats):**")
             st.dataframe(summary, use_container_width=True)
@@ -287,10 +407,10 @@ else:
 # -----------------------------
 st.subheader("4) Plain-Language Summary + Cautions")
 
-summary_text = make_plain_language_summary(df, numeric_cols, non_numeric_cols)
+summary_text = make_plain_language_summary(df, numeric_cols, non_numeric_cols, na_col_frac, overall_missing)
 st.markdown(summary_text)
 
-flags = caution_flags(df, numeric_cols)
+flags = caution_flags(df, numeric_cols, na_col_frac, overall_missing)
 if flags:
     st.write("**Caution flags (automatic checks):**")
     for f in flags:
@@ -15,7 +15,8 @@ Features:
 - Save JSON compatible with pattern.py (version 2 format)
 
 Dependencies:
-- Pillow: pip install pillow
+- Pillow, numpy: pip install pillow numpy
+- Optional: orjson (faster JSON export for large grids)
 (Tkinter is usually included with Python on Windows/macOS; Linux may need system package.)
 """
 
@@ -26,6 +27,7 @@ import re
 import tkinter as tk
 from tkinter import filedialog, messagebox, colorchooser
 
+import numpy as np
 from PIL import Image, ImageOps
 
 HEX_RE = re.compile(r"^#([0-9a-fA-F]{6})$")
@@ -42,62 +44,63 @@ def normalize_hex(s: str) -> str | None:
     return None
 
 
-def otsu_threshold(gray_img: Image.Image) -> int:
+def otsu_threshold(gray: Image.Image | np.ndarray) -> int:
     """
-    Compute Otsu threshold from an 8-bit grayscale PIL image without numpy.
+    Compute Otsu threshold from an 8-bit grayscale PIL image or uint8 array.
     Returns threshold in [0..255].
     """
-    if gray_img.mode != "L":
-        gray_img = gray_img.convert("L")
-    hist = gray_img.histogram()  # 256 bins
+    if isinstance(gray, Image.Image):
+        gray = np.asarray(gray.convert("L") if gray.mode != "L" else gray, dtype=np.uint8)
+    hist = np.bincount(gray.ravel(), minlength=256).astype(np.float64)  # 256 bins
 
-    total = sum(hist)
+    total = hist.sum()
     if total == 0:
         return 128
 
-    sum_total = sum(i * h for i, h in enumerate(hist))
+    levels = np.arange(256, dtype=np.float64)
+    w_b = np.cumsum(hist)
+    w_f = total - w_b
+    sum_b = np.cumsum(levels * hist)
+    sum_total = sum_b[-1]
 
-    sum_b = 0
-    w_b = 0
-    max_var = -1.0
-    threshold = 128
-
-    for t in range(256):
-        w_b += hist[t]
-        if w_b == 0:
-            continue
-        w_f = total - w_b
-        if w_f == 0:
-            break
-
-        sum_b += t * hist[t]
+    with np.errstate(divide="ignore", invalid="ignore"):
         m_b = sum_b / w_b
         m_f = (sum_total - sum_b) / w_f
-
         # between-class variance
         var_between = w_b * w_f * (m_b - m_f) ** 2
-        if var_between > max_var:
-            max_var = var_between
-            threshold = t
+    var_between[(w_b == 0) | (w_f == 0)] = -np.inf
 
-    return threshold
+    if not np.isfinite(var_between).any():
+        return 128
+    return int(np.argmax(var_between))
 
 
-def infer_figure_is_dark(gray_img: Image.Image, t: int) -> bool:
+def infer_figure_is_dark(gray: Image.Image | np.ndarray, t: int) -> bool:
     """
     Decide whether the figure is dark-on-light or light-on-dark.
     Heuristic: whichever side is *smaller* is likely the figure.
     Returns True if figure pixels are < t (dark).
     """
-    if gray_img.mode != "L":
-        gray_img = gray_img.convert("L")
-    pixels = gray_img.getdata()
-    dark = sum(1 for p in pixels if p < t)
-    light = len(pixels) - dark
+    if isinstance(gray, Image.Image):
+        gray = np.asarray(gray.convert("L") if gray.mode != "L" else gray, dtype=np.uint8)
+    dark = int(np.count_nonzero(gray < t))
+    light = gray.size - dark
     # If dark is the minority, treat dark as figure; else light as figure.
     return dark <= light
 
 
+def write_grid_json(obj: dict, path: str) -> None:
+    """Write a grid dict as indented JSON (orjson when available, else stdlib json)."""
+    try:
+        import orjson
+    except ImportError:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(obj, f, indent=2)
+        return
+    with open(path, "wb") as f:
+        f.write(orjson.dumps(obj, option=orjson.OPT_INDENT_2))
+
+
 def image_to_grid_json(
     image_path: str,
     rows: int,
@@ -124,55 +127,53 @@ def image_to_grid_json(
     bg = normalize_hex(bg_hex) or "#FFFFFF"
     fg = normalize_hex(figure_hex) or "#000000"
 
+    usable_rows = rows - header_rows - footer_rows
+    # Keep at least ~8 source pixels per cell; anything beyond that is just extra
+    # pixels for LANCZOS to read.
+    min_w, min_h = max(256, cols * 8), max(256, usable_rows * 8)
+
     img = Image.open(image_path)
+    # JPEG: decode at a reduced DCT scale (never below the requested size;
+    # square request because EXIF rotation may swap the axes).
+    side = max(min_w, min_h)
+    img.draft("L", (side, side))
     img = ImageOps.exif_transpose(img)  # handle phone rotation
     gray = img.convert("L")
-
-    t = threshold_override if threshold_override is not None else otsu_threshold(gray)
-    figure_is_dark = infer_figure_is_dark(gray, t)
-
-    # Determine if we should invert selection
-    # "figure_is_dark" means pixels < t are figure.
-    # If not, pixels >= t are figure.
-    invert = force_invert
-
-    usable_rows = rows - header_rows - footer_rows
+    factor = min(gray.width // min_w, gray.height // min_h)
+    if factor >= 2:
+        gray = gray.reduce(factor)  # integer box downscale in C
 
     # Resize to target grid resolution for sampling
     # We map the figure into the usable area only.
     # Use LANCZOS to preserve shape, then threshold per cell.
     resized = gray.resize((cols, usable_rows), Image.Resampling.LANCZOS)
+    # Otsu and figure detection only need the grid-sized pixels, not the full photo.
+    resized_arr = np.asarray(resized, dtype=np.uint8)
+
+    t = threshold_override if threshold_override is not None else otsu_threshold(resized_arr)
+    figure_is_dark = infer_figure_is_dark(resized_arr, t)
 
-    cells: list[list[str | None]] = [[None for _ in range(cols)] for _ in range(rows)]
+    # Determine if we should invert selection
+    # "figure_is_dark" means pixels < t are figure.
+    # If not, pixels >= t are figure.
+    invert = force_invert
 
-    for ru in range(usable_rows):
-        grid_r = header_rows + ru  # top-based row in full grid
+    # 256-entry lookup table folds threshold, figure polarity and invert into one
+    # C-level pass over the resized pixels.
+    lut = [255 if ((p < t) == figure_is_dark) != invert else 0 for p in range(256)]
 
+    # Full-grid 0/1 mask: header/footer rows stay background, the usable band is
+    # one slice write.
+    mask = np.zeros((rows, cols), dtype=np.int8)
+    mask[header_rows:header_rows + usable_rows] = np.asarray(resized.point(lut), dtype=bool)
+    if odd_rows_only:
         # user-facing row numbering matches your editor/export logic:
         # row 1 is bottom, row N is top
-        row_num_from_bottom = rows - grid_r
-
-        fill_this_row = True
-        if odd_rows_only and (row_num_from_bottom % 2 == 0):
-            fill_this_row = False
-
-        for c in range(cols):
-            if not fill_this_row:
-                cells[grid_r][c] = None
-                continue
-
-            p = resized.getpixel((c, ru))
-            is_dark = p < t
+        row_from_bottom = rows - np.arange(rows)
+        mask[row_from_bottom % 2 == 0] = 0
 
-            if figure_is_dark:
-                is_figure = is_dark
-            else:
-                is_figure = not is_dark
-
-            if invert:
-                is_figure = not is_figure
-
-            cells[grid_r][c] = fg if is_figure else None
+    # Expand to the pattern.py cell values in one C-level pass.
+    cells: list[list[str | None]] = np.array([None, fg], dtype=object)[mask].tolist()
 
     return {
         "version": 2,
@@ -374,8 +375,7 @@ class ImageToCrochetApp(tk.Tk):
         if not out:
             return
 
-        with open(out, "w", encoding="utf-8") as f:
-            json.dump(obj, f, indent=2)
+        write_grid_json(obj, out)
 
         self.status.set(f"Exported JSON: {out}")
 
@@ -23,18 +23,39 @@ Run:
 
 from __future__ import annotations
 
-import copy
+import asyncio
+import base64
 import io
 import json
+import zlib
+from collections import deque
 from dataclasses import dataclass
-from typing import List, Optional, Tuple
+from functools import lru_cache
+from typing import Deque, Dict, List, Optional, Tuple
 
+import numpy as np
 from nicegui import ui, events
-from PIL import Image, ImageDraw
+from PIL import Image, ImageColor, ImageDraw
 from reportlab.lib.pagesizes import letter
+from reportlab.lib.utils import ImageReader
 from reportlab.pdfgen import canvas as pdf_canvas
 
+try:
+    import orjson  # optional: much faster encoding of the grid payloads
+except ImportError:
+    orjson = None
 
+
+def dumps_json(obj, indent: bool = False) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+    return json.dumps(obj, indent=2 if indent else None).encode("utf-8")
+
+
+GRIDLINE_MIN_CELL = 8  # px; smaller cells are drawn without gridlines
+
+
+@lru_cache(maxsize=256)  # called on every paint op with the same handful of colors
 def normalize_hex(s: str) -> str:
     s = (s or "").strip()
     if not s:
@@ -48,11 +69,17 @@ def normalize_hex(s: str) -> str:
 
 @dataclass
 class Snapshot:
-    grid: List[List[Optional[str]]]
+    cells: bytes
+    palette: Tuple[Optional[str], ...]
     bg_color: str
 
 
 class CrochetModel:
+    """Grid state stored as one byte per cell (row-major) indexing into a color palette.
+
+    palette[0] is always None (empty cell); other entries are normalized hex strings.
+    """
+
     def __init__(self, rows: int = 30, cols: int = 30, cell_size: int = 18) -> None:
         self.rows = int(rows)
         self.cols = int(cols)
@@ -63,38 +90,91 @@ class CrochetModel:
         self.mode: str = "paint"  # paint | erase | fill | eyedropper
         self.show_numbers: bool = False
 
-        self.grid: List[List[Optional[str]]] = [[None for _ in range(self.cols)] for _ in range(self.rows)]
+        self.reset_grid(self.rows, self.cols)
 
-        self.undo_stack: List[Snapshot] = []
-        self.redo_stack: List[Snapshot] = []
+        self.undo_stack: Deque[Snapshot] = deque(maxlen=50)  # oldest entry drops off in O(1)
+        self.redo_stack: Deque[Snapshot] = deque()
         self._pending_snapshot: Optional[Snapshot] = None
+        self._action_changed: bool = False  # set by any grid/bg edit while an action is open
+        # cells repainted since the last flush_dirty(); _dirty_all forces a full redraw instead
+        self._dirty: List[Tuple[int, int, Optional[str]]] = []
+        self._dirty_all: bool = False
 
     # --- state helpers ---
+    def reset_grid(self, rows: int, cols: int) -> None:
+        self.rows, self.cols = rows, cols
+        self.cells = bytearray(rows * cols)
+        self.palette: List[Optional[str]] = [None]
+        self._palette_index: Dict[str, int] = {}
+
+    def color_index(self, color: str) -> int:
+        """Palette index for a normalized hex color, adding it if new."""
+        idx = self._palette_index.get(color)
+        if idx is None:
+            if len(self.palette) > 255:
+                self._compact_palette()
+                if len(self.palette) > 255:
+                    raise ValueError("Too many distinct colors (max 255)")
+            idx = len(self.palette)
+            self.palette.append(color)
+            self._palette_index[color] = idx
+        return idx
+
+    def _compact_palette(self) -> None:
+        # Drop colors no longer used by any cell and renumber the rest
+        used = sorted(set(self.cells) - {0})
+        remap = bytearray(256)
+        for new_idx, old_idx in enumerate(used, start=1):
+            remap[old_idx] = new_idx
+        self.cells = bytearray(self.cells.translate(remap))
+        self.palette = [None] + [self.palette[i] for i in used]
+        self._palette_index = {color: i for i, color in enumerate(self.palette) if color}
+
+    @property
+    def grid(self) -> List[List[Optional[str]]]:
+        """List-of-rows view of the cells (hex or None), built on demand."""
+        pal, cols = self.palette, self.cols
+        colors = [pal[i] for i in self.cells]
+        return [colors[r * cols:(r + 1) * cols] for r in range(self.rows)]
+
+    def get_cell(self, r: int, c: int) -> Optional[str]:
+        return self.palette[self.cells[r * self.cols + c]]
+
     def snapshot(self) -> Snapshot:
-        return Snapshot(grid=copy.deepcopy(self.grid), bg_color=self.bg_color)
+        # one memcpy for the whole grid
+        return Snapshot(cells=bytes(self.cells), palette=tuple(self.palette), bg_color=self.bg_color)
 
     def push_undo(self, snap: Snapshot) -> None:
         self.undo_stack.append(snap)
-        if len(self.undo_stack) > 50:
-            self.undo_stack.pop(0)
 
     def begin_action(self) -> None:
         if self._pending_snapshot is None:
             self._pending_snapshot = self.snapshot()
+            self._action_changed = False
 
     def end_action(self) -> None:
         if self._pending_snapshot is None:
             return
+        if not self._action_changed:
+            # nothing was edited (e.g. a click on an already-painted cell): no snapshot/compare needed
+            self._pending_snapshot = None
+            return
         before = self._pending_snapshot
         after = self.snapshot()
         self._pending_snapshot = None
 
-        if json.dumps(before.grid) != json.dumps(after.grid) or before.bg_color != after.bg_color:
+        # The palette only grows between compactions, so equal bytes plus an
+        # unchanged palette prefix means every cell still has the same color.
+        same_grid = before.cells == after.cells and after.palette[:len(before.palette)] == before.palette
+        if not same_grid or before.bg_color != after.bg_color:
             self.push_undo(before)
             self.redo_stack.clear()
 
     def restore(self, snap: Snapshot) -> None:
-        self.grid = copy.deepcopy(snap.grid)
+        # copy into the existing buffers rather than allocating new ones on every undo/redo
+        self.cells[:] = snap.cells
+        self.palette[:] = snap.palette
+        self._palette_index = {color: i for i, color in enumerate(self.palette) if color}
         self.bg_color = snap.bg_color
 
     def undo(self) -> bool:
@@ -125,55 +205,100 @@ class CrochetModel:
     def apply_tool_at(self, r: int, c: int) -> bool:
         if not self.in_bounds(r, c):
             return False
+        i = r * self.cols + c
 
         if self.mode == "paint":
-            new = self.current_paint_color()
-            if self.grid[r][c] != new:
-                self.grid[r][c] = new
+            new = self.color_index(self.current_paint_color())
+            if self.cells[i] != new:
+                self.cells[i] = new
+                self._action_changed = True
+                self._dirty.append((r, c, self.palette[new]))
                 return True
             return False
 
         if self.mode == "erase":
-            if self.grid[r][c] is not None:
-                self.grid[r][c] = None
+            if self.cells[i]:
+                self.cells[i] = 0
+                self._action_changed = True
+                self._dirty.append((r, c, None))
                 return True
             return False
 
         if self.mode == "eyedropper":
-            picked = self.grid[r][c]
+            picked = self.palette[self.cells[i]]
             if picked:
                 self.active_color = picked
                 return True
             return False
 
         if self.mode == "fill":
-            target = self.grid[r][c]
-            replacement = self.current_paint_color()
+            # Intern first: color_index may compact the palette and renumber the cells
+            replacement = self.color_index(self.current_paint_color())
+            target = self.cells[i]
             if target == replacement:
                 return False
             self.bucket_fill(r, c, target, replacement)
+            self._action_changed = True
+            self._dirty_all = True
             return True
 
         return False
 
-    def bucket_fill(self, r0: int, c0: int, target: Optional[str], replacement: str) -> None:
-        if not self.in_bounds(r0, c0):
+    def flush_dirty(self) -> Optional[List[Tuple[int, int, Optional[str]]]]:
+        """Return and reset the cells changed since the last call (None = redraw everything)."""
+        dirty = None if self._dirty_all else self._dirty
+        self._dirty = []
+        self._dirty_all = False
+        return dirty
+
+    def bucket_fill(self, r0: int, c0: int, target: int, replacement: int) -> None:
+        """Flood-fill palette index target with replacement, starting at (r0, c0).
+
+        Scanline fill: each popped seed fills its whole horizontal run, then
+        seeds only the first cell of each matching run in the rows above/below.
+        """
+        if not self.in_bounds(r0, c0) or target == replacement:
             return
-        if self.grid[r0][c0] != target:
+        cells, rows, cols = self.cells, self.rows, self.cols
+        if cells[r0 * cols + c0] != target:
             return
 
         stack = [(r0, c0)]
         while stack:
             r, c = stack.pop()
-            if not self.in_bounds(r, c):
+            base = r * cols
+            if cells[base + c] != target:
                 continue
-            if self.grid[r][c] != target:
-                continue
-            self.grid[r][c] = replacement
-            stack.append((r - 1, c))
-            stack.append((r + 1, c))
-            stack.append((r, c - 1))
-            stack.append((r, c + 1))
+            left = c
+            while left > 0 and cells[base + left - 1] == target:
+                left -= 1
+            right = c
+            while right < cols - 1 and cells[base + right + 1] == target:
+                right += 1
+            cells[base + left:base + right + 1] = bytes((replacement,)) * (right - left + 1)
+
+            for nr in (r - 1, r + 1):
+                if not 0 <= nr < rows:
+                    continue
+                nbase = nr * cols
+                in_run = False
+                for x in range(left, right + 1):
+                    if cells[nbase + x] == target:
+                        if not in_run:
+                            stack.append((nr, x))
+                            in_run = True
+                    else:
+                        in_run = False
+
+    def clear(self) -> None:
+        if any(self.cells):
+            self.cells[:] = bytes(len(self.cells))
+            self._action_changed = True
+
+    def set_bg_color(self, color: str) -> None:
+        if color != self.bg_color:
+            self.bg_color = color
+            self._action_changed = True
 
     # --- persistence ---
     def to_json_obj(self) -> dict:
@@ -182,7 +307,7 @@ class CrochetModel:
         Original schema (pattern.py):
           {version, rows, cols, background, cells}
 
-        We also include our newer keys for forward-compat.
+        The prototype's bg_color/grid keys are still accepted by load_json_obj.
         """
         return {
             "version": 2,
@@ -190,92 +315,107 @@ class CrochetModel:
             "cols": self.cols,
             "background": self.bg_color,
             "cells": self.grid,
-            # extras:
-            "bg_color": self.bg_color,
-            "grid": self.grid,
         }
 
     def load_json_obj(self, obj: dict) -> None:
-        # Accept both schemas:
+        # Accept these schemas:
         # A) Tk app: {version, rows, cols, background, cells}
-        # B) Early NiceGUI prototype: {version, rows, cols, bg_color, grid}
+        # B) Tk app v3: {version, rows, cols, background, palette, grid_b64}
+        # C) Early NiceGUI prototype: {version, rows, cols, bg_color, grid}
         rows = int(obj.get("rows", self.rows))
         cols = int(obj.get("cols", self.cols))
 
         bg = obj.get("background", obj.get("bg_color", self.bg_color))
         bg = normalize_hex(bg) or "#ffffff"
 
-        grid = obj.get("cells", obj.get("grid"))
+        if "grid_b64" in obj:
+            idx = np.frombuffer(zlib.decompress(base64.b64decode(obj["grid_b64"])), dtype=np.uint8)
+            grid = np.array(obj["palette"], dtype=object)[idx.reshape(rows, cols)].tolist()
+        else:
+            grid = obj.get("cells", obj.get("grid"))
         if not isinstance(grid, list):
             raise ValueError("Invalid grid in JSON")
 
-        self.rows, self.cols = rows, cols
+        self.reset_grid(rows, cols)
         self.bg_color = bg
-        self.grid = [[None for _ in range(cols)] for _ in range(rows)]
 
         # Validate shape loosely; if mismatch, load overlapping portion
         for r in range(min(rows, len(grid))):
             row = grid[r]
             if not isinstance(row, list):
                 continue
+            base = r * cols
             for c in range(min(cols, len(row))):
                 val = row[c]
-                self.grid[r][c] = normalize_hex(val) if val else None
+                if val:
+                    self.cells[base + c] = self.color_index(normalize_hex(val))
 
         self.undo_stack.clear()
         self.redo_stack.clear()
         self._pending_snapshot = None
 
     # --- exports ---
-    def render_png_bytes(self, show_numbers: bool = False) -> bytes:
+    def show_gridlines(self) -> bool:
+        # below this cell size the lines are mostly visual noise and dominate paint cost
+        return self.cell_size >= GRIDLINE_MIN_CELL
+
+    def export_copy(self) -> CrochetModel:
+        """Detached copy of the drawable state, safe to render off the event loop."""
+        other = CrochetModel.__new__(CrochetModel)
+        other.rows, other.cols, other.cell_size = self.rows, self.cols, self.cell_size
+        other.bg_color = self.bg_color
+        other.cells = bytes(self.cells)
+        other.palette = list(self.palette)
+        return other
+
+    def _render_image(self, show_numbers: bool = False) -> Image.Image:
         cell = self.cell_size
-        w = self.cols * cell
-        h = self.rows * cell
-
-        img = Image.new("RGB", (w, h), self.bg_color)
-        draw = ImageDraw.Draw(img)
-
-        for r in range(self.rows):
-            y0 = r * cell
-            for c in range(self.cols):
-                x0 = c * cell
-                color = self.grid[r][c]
-                if color:
-                    draw.rectangle([x0, y0, x0 + cell - 1, y0 + cell - 1], fill=color)
-
-        for c in range(self.cols + 1):
-            x = c * cell
-            draw.line([(x, 0), (x, h)], fill="#cccccc")
-        for r in range(self.rows + 1):
-            y = r * cell
-            draw.line([(0, y), (w, y)], fill="#cccccc")
+
+        # palette index -> RGB (index 0 = empty = background), then blow each cell up
+        # to a cell x cell block in one vectorized pass
+        lut = np.array([ImageColor.getrgb(c or self.bg_color) for c in self.palette], dtype=np.uint8)
+        idx = np.frombuffer(self.cells, dtype=np.uint8).reshape(self.rows, self.cols)
+        arr = lut[idx].repeat(cell, axis=0).repeat(cell, axis=1)
+
+        # gridlines on every cell boundary (the far edges fall outside the image)
+        if self.show_gridlines():
+            arr[:, ::cell] = (204, 204, 204)
+            arr[::cell, :] = (204, 204, 204)
+
+        img = Image.fromarray(arr, "RGB")
 
         if show_numbers:
-            for c in range(self.cols):
-                draw.text((c * cell + 2, 2), str(c + 1), fill="#333333")
-            for r in range(self.rows):
-                draw.text((2, r * cell + 2), str(r + 1), fill="#333333")
+            draw = ImageDraw.Draw(img)
+            # label offsets: cell origins stepped once rather than multiplied per label
+            for n, x in enumerate(range(2, self.cols * cell, cell), start=1):
+                draw.text((x, 2), str(n), fill="#333333")
+            for n, y in enumerate(range(2, self.rows * cell, cell), start=1):
+                draw.text((2, y), str(n), fill="#333333")
 
+        return img
+
+    def render_png_bytes(self, show_numbers: bool = False) -> bytes:
+        img = self._render_image(show_numbers=show_numbers)
         buf = io.BytesIO()
-        img.save(buf, format="PNG")
+        img.save(buf, format="PNG", compress_level=1)  # speed over size; grids compress well anyway
         return buf.getvalue()
 
     def render_pdf_bytes(self, show_numbers: bool = False) -> bytes:
-        png = self.render_png_bytes(show_numbers=show_numbers)
         buf = io.BytesIO()
 
         c = pdf_canvas.Canvas(buf, pagesize=letter)
         page_w, page_h = letter
 
-        img = Image.open(io.BytesIO(png))
-        iw, ih = img.size
+        # rendered image goes straight to ReportLab (as an image XObject): no PNG encode/decode
+        img = ImageReader(self._render_image(show_numbers=show_numbers))
+        iw, ih = img.getSize()
         max_w = page_w - 72
         max_h = page_h - 72
         scale = min(max_w / iw, max_h / ih)
         dw, dh = iw * scale, ih * scale
         x = (page_w - dw) / 2
         y = (page_h - dh) / 2
-        c.drawInlineImage(img, x, y, dw, dh)
+        c.drawImage(img, x, y, dw, dh)
         c.showPage()
         c.save()
 
@@ -292,7 +432,8 @@ def canvas_dims() -> Tuple[int, int]:
 
 
 def js_bind_handlers() -> str:
-    # binds pointer events on the canvas and forwards them as window CustomEvents
+    # binds pointer events on the canvas and forwards them as window CustomEvents;
+    # also installs the drawing functions that later redraws call with JSON state
     return """
     (function() {
       const canvas = document.getElementById('grid_canvas');
@@ -313,75 +454,196 @@ def js_bind_handlers() -> str:
       canvas.onpointermove = (e) => window.dispatchEvent(new CustomEvent('ng_pointermove', {detail: pack(e)}));
       canvas.onpointerup   = (e) => window.dispatchEvent(new CustomEvent('ng_pointerup',   {detail: pack(e)}));
       canvas.onpointerleave= (e) => window.dispatchEvent(new CustomEvent('ng_pointerleave',{detail: pack(e)}));
+
+      function hexToRgb(hex) {
+        const n = parseInt(hex.slice(1, 7), 16) || 0;
+        return [(n >> 16) & 255, (n >> 8) & 255, n & 255];
+      }
+
+      // the last full state, kept current by ng_paint_cells, so bg/number toggles
+      // can repaint without Python resending every cell
+      window.ng_last_state = null;
+
+      // state: {w, h, cell, rows, cols, bg, palette, cells (base64 palette indices), lines, show}
+      window.ng_redraw = function(state) {
+        // one byte per cell (row-major), indexing palette; palette[0] (null) = background.
+        // decoded into 16 bits so colors added by later cell updates still fit
+        const bin = atob(state.cells);
+        const idx = new Uint16Array(bin.length);
+        for(let i=0; i<bin.length; i++) idx[i] = bin.charCodeAt(i);
+        window.ng_last_state = Object.assign({}, state, {palette: state.palette.slice(), idx: idx});
+        draw(window.ng_last_state);
+      };
+
+      window.ng_set_bg = function(hex) {
+        const state = window.ng_last_state;
+        if(!state) return;
+        state.bg = hex;
+        draw(state);
+      };
+
+      window.ng_set_numbers = function(show) {
+        const state = window.ng_last_state;
+        if(!state) return;
+        state.show = show;
+        draw(state);
+      };
+
+      function draw(state) {
+        pendingCells = [];  // the full redraw supersedes queued cell updates
+        const ctx = canvas.getContext('2d');
+        const cell = state.cell;
+        const rows = state.rows, cols = state.cols;
+        const idx = state.idx;
+        canvas.width = state.w;
+        canvas.height = state.h;
+
+        ctx.fillStyle = state.bg;
+        ctx.fillRect(0,0,canvas.width,canvas.height);
+
+        const colors = state.palette.map(c => c || state.bg);
+
+        if(cell <= 8) {
+          // small cells: paint one pixel per cell, then scale up in a single blit
+          const off = document.createElement('canvas');
+          off.width = cols;
+          off.height = rows;
+          const octx = off.getContext('2d');
+          const img = octx.createImageData(cols, rows);
+          const rgb = colors.map(hexToRgb);
+          for(let i=0; i<idx.length; i++) {
+            const px = rgb[idx[i]];
+            img.data[i*4] = px[0];
+            img.data[i*4 + 1] = px[1];
+            img.data[i*4 + 2] = px[2];
+            img.data[i*4 + 3] = 255;
+          }
+          octx.putImageData(img, 0, 0);
+          ctx.imageSmoothingEnabled = false;
+          ctx.drawImage(off, 0, 0, cols*cell, rows*cell);
+        } else {
+          // one path per color, so fillStyle changes once per distinct color instead of per cell
+          const paths = colors.map(() => null);
+          for(let r=0; r<rows; r++) {
+            for(let c=0; c<cols; c++) {
+              const k = idx[r*cols + c];
+              if(k) {
+                const p = paths[k] || (paths[k] = new Path2D());
+                p.rect(c*cell, r*cell, cell, cell);
+              }
+            }
+          }
+          paths.forEach((p, k) => {
+            if(p) {
+              ctx.fillStyle = colors[k];
+              ctx.fill(p);
+            }
+          });
+        }
+
+        // all gridlines in a single stroke
+        if(state.lines) {
+          const lines = new Path2D();
+          for(let c=0; c<=state.cols; c++) {
+            lines.moveTo(c*cell + 0.5, 0);
+            lines.lineTo(c*cell + 0.5, canvas.height);
+          }
+          for(let r=0; r<=state.rows; r++) {
+            lines.moveTo(0, r*cell + 0.5);
+            lines.lineTo(canvas.width, r*cell + 0.5);
+          }
+          ctx.strokeStyle = '#cccccc';
+          ctx.lineWidth = 1;
+          ctx.stroke(lines);
+        }
+
+        if(state.show) {
+          ctx.fillStyle = '#333333';
+          ctx.font = '10px sans-serif';
+          for(let c=0; c<state.cols; c++) {
+            ctx.fillText(String(c+1), c*cell + 2, 10);
+          }
+          for(let r=0; r<state.rows; r++) {
+            ctx.fillText(String(r+1), 2, r*cell + 10);
+          }
+        }
+      }
+
+      // repaint only the changed cells (and their gridline borders), at most once per frame
+      // state: {cell, bg, lines, cells: [[r, c, color|null], ...]}
+      let pendingCells = [];
+      let frame = 0;
+      function paintPending() {
+        frame = 0;
+        const ctx = canvas.getContext('2d');
+        ctx.strokeStyle = '#cccccc';
+        ctx.lineWidth = 1;
+        for(const [r, c, col, cell, lines] of pendingCells) {
+          ctx.fillStyle = col;
+          ctx.fillRect(c*cell, r*cell, cell, cell);
+          if(lines) ctx.strokeRect(c*cell + 0.5, r*cell + 0.5, cell, cell);
+        }
+        pendingCells = [];
+      }
+      window.ng_paint_cells = function(state) {
+        const last = window.ng_last_state;
+        for(const [r, c, col] of state.cells) {
+          pendingCells.push([r, c, col || state.bg, state.cell, state.lines]);
+          if(last) {
+            let k = 0;
+            if(col) {
+              k = last.palette.indexOf(col);
+              if(k < 0) k = last.palette.push(col) - 1;
+            }
+            last.idx[r*last.cols + c] = k;
+          }
+        }
+        if(!frame) frame = requestAnimationFrame(paintPending);
+      };
     })();
     """
 
 
 def js_redraw_all() -> str:
+    # the drawing code is installed once by js_bind_handlers(); only the state travels
     w, h = canvas_dims()
-    cell = model.cell_size
-    show = "true" if model.show_numbers else "false"
-    grid_json = json.dumps(model.grid)
-    bg = model.bg_color
+    state = {
+        "w": w,
+        "h": h,
+        "cell": model.cell_size,
+        "rows": model.rows,
+        "cols": model.cols,
+        "bg": model.bg_color,
+        # raw palette-index bytes instead of a nested list of hex strings
+        "palette": model.palette,
+        "cells": base64.b64encode(model.cells).decode("ascii"),
+        "lines": model.show_gridlines(),
+        "show": model.show_numbers,
+    }
+    return f"window.ng_redraw && window.ng_redraw({dumps_json(state).decode()})"
 
-    return f"""
-    (function(){{
-      const canvas = document.getElementById('grid_canvas');
-      if(!canvas) return;
-      const ctx = canvas.getContext('2d');
-      const cell = {cell};
-      canvas.width = {w};
-      canvas.height = {h};
-
-      ctx.fillStyle = {json.dumps(bg)};
-      ctx.fillRect(0,0,canvas.width,canvas.height);
-
-      const grid = {grid_json};
-
-      for(let r=0; r<grid.length; r++) {{
-        const row = grid[r];
-        for(let c=0; c<row.length; c++) {{
-          const col = row[c];
-          if(col) {{
-            ctx.fillStyle = col;
-            ctx.fillRect(c*cell, r*cell, cell, cell);
-          }}
-        }}
-      }}
-
-      ctx.strokeStyle = '#cccccc';
-      ctx.lineWidth = 1;
-      for(let c=0; c<={model.cols}; c++) {{
-        ctx.beginPath();
-        ctx.moveTo(c*cell + 0.5, 0);
-        ctx.lineTo(c*cell + 0.5, canvas.height);
-        ctx.stroke();
-      }}
-      for(let r=0; r<={model.rows}; r++) {{
-        ctx.beginPath();
-        ctx.moveTo(0, r*cell + 0.5);
-        ctx.lineTo(canvas.width, r*cell + 0.5);
-        ctx.stroke();
-      }}
-
-      if({show}) {{
-        ctx.fillStyle = '#333333';
-        ctx.font = '10px sans-serif';
-        for(let c=0; c<{model.cols}; c++) {{
-          ctx.fillText(String(c+1), c*cell + 2, 10);
-        }}
-        for(let r=0; r<{model.rows}; r++) {{
-          ctx.fillText(String(r+1), 2, r*cell + 10);
-        }}
-      }}
-    }})();
-    """
+
+def js_set_bg() -> str:
+    # repaints from the state cached by the last ng_redraw with only the background swapped
+    return f"window.ng_set_bg && window.ng_set_bg({dumps_json(model.bg_color).decode()})"
+
+
+def js_set_numbers() -> str:
+    return f"window.ng_set_numbers && window.ng_set_numbers({dumps_json(model.show_numbers).decode()})"
+
+
+def js_apply_dirty(dirty: List[Tuple[int, int, Optional[str]]]) -> str:
+    state = {"cell": model.cell_size, "bg": model.bg_color, "lines": model.show_gridlines(), "cells": dirty}
+    return f"window.ng_paint_cells && window.ng_paint_cells({dumps_json(state).decode()})"
 
 
 @ui.page("/")
 def main_page() -> None:
     # drawing state per-client/page
-    is_drawing = {"down": False, "last_cell": None, "button": 0}
+    # last_box: pixel bounds (x0, y0, x1, y1) of last_cell, so moves inside it return early
+    is_drawing = {"down": False, "last_cell": None, "last_box": None, "button": 0}
+    draw_state = {"scheduled": False}
+    client = ui.context.client
 
     ui.add_head_html("""
     <style>
@@ -406,14 +668,31 @@ def main_page() -> None:
         redo_btn.props(f'color={"primary" if model.redo_stack else "grey"}')
 
     def redraw() -> None:
+        model.flush_dirty()  # the full redraw covers any pending cell updates
         ui.run_javascript(js_redraw_all())
         update_toolbar_state()
 
+    def draw_dirty() -> None:
+        draw_state["scheduled"] = False
+        dirty = model.flush_dirty()
+        with client:  # runs from the event loop, outside the handler's UI context
+            # number labels live in row/col 0 and would be painted over: fall back to a full redraw
+            if dirty is None or (model.show_numbers and any(r == 0 or c == 0 for r, c, _ in dirty)):
+                redraw()
+            elif dirty:
+                ui.run_javascript(js_apply_dirty(dirty))
+
+    def schedule_draw() -> None:
+        # pointer events that arrive together share one draw message
+        if not draw_state["scheduled"]:
+            draw_state["scheduled"] = True
+            asyncio.get_running_loop().call_soon(draw_dirty)
+
     def apply_at(r: int, c: int) -> None:
         changed = model.apply_tool_at(r, c)
         color_picker.value = model.active_color
         if changed:
-            redraw()
+            schedule_draw()
 
     def on_pointerdown(e: events.GenericEventArguments) -> None:
         cell = cell_from_event(e)
@@ -423,6 +702,7 @@ def main_page() -> None:
         is_drawing["down"] = True
         is_drawing["button"] = btn
         is_drawing["last_cell"] = None
+        is_drawing["last_box"] = None
 
         model.begin_action()
 
@@ -434,11 +714,23 @@ def main_page() -> None:
             model.mode = prev_mode
         else:
             apply_at(r, c)
+        remember_cell(cell)
+
+    def remember_cell(cell: Tuple[int, int]) -> None:
+        r, c = cell
+        size = model.cell_size
         is_drawing["last_cell"] = cell
+        is_drawing["last_box"] = (c * size, r * size, (c + 1) * size, (r + 1) * size)
 
     def on_pointermove(e: events.GenericEventArguments) -> None:
         if not is_drawing["down"]:
             return
+        box = is_drawing["last_box"]
+        if box is not None:
+            ox = e.args.get("offsetX")
+            oy = e.args.get("offsetY")
+            if ox is not None and oy is not None and box[0] <= ox < box[2] and box[1] <= oy < box[3]:
+                return  # still inside the cell we just applied
         cell = cell_from_event(e)
         if cell is None:
             return
@@ -454,15 +746,17 @@ def main_page() -> None:
             model.mode = prev_mode
         else:
             apply_at(r, c)
-        is_drawing["last_cell"] = cell
+        remember_cell(cell)
 
     def on_pointerup(_: events.GenericEventArguments) -> None:
         if not is_drawing["down"]:
             return
         is_drawing["down"] = False
         is_drawing["last_cell"] = None
+        is_drawing["last_box"] = None
         model.end_action()
-        redraw()
+        # cells were already painted incrementally; only undo/redo availability changed
+        update_toolbar_state()
 
     def set_mode(value: str) -> None:
         model.mode = value
@@ -472,13 +766,14 @@ def main_page() -> None:
 
     def set_bg_color(value: str) -> None:
         model.begin_action()
-        model.bg_color = normalize_hex(value)
+        model.set_bg_color(normalize_hex(value))
         model.end_action()
-        redraw()
+        ui.run_javascript(js_set_bg())
+        update_toolbar_state()
 
     def toggle_numbers(value: bool) -> None:
         model.show_numbers = bool(value)
-        redraw()
+        ui.run_javascript(js_set_numbers())
 
     def do_undo() -> None:
         if model.undo():
@@ -493,8 +788,8 @@ def main_page() -> None:
         cols = int(cols)
         cell_size = int(cell_size)
         model.begin_action()
-        model.rows, model.cols, model.cell_size = rows, cols, cell_size
-        model.grid = [[None for _ in range(cols)] for _ in range(rows)]
+        model.reset_grid(rows, cols)
+        model.cell_size = cell_size
         model.bg_color = "#ffffff"
         model.active_color = "#000000"
         model.undo_stack.clear()
@@ -509,14 +804,12 @@ def main_page() -> None:
 
     def clear_grid() -> None:
         model.begin_action()
-        for r in range(model.rows):
-            for c in range(model.cols):
-                model.grid[r][c] = None
+        model.clear()
         model.end_action()
         redraw()
 
     def download_json() -> None:
-        payload = json.dumps(model.to_json_obj(), indent=2).encode("utf-8")
+        payload = dumps_json(model.to_json_obj(), indent=True)
         ui.download(payload, filename="crochet_pattern.json")
 
     async def load_json_from_upload(e: events.UploadEventArguments) -> None:
@@ -540,11 +833,17 @@ def main_page() -> None:
         except Exception as ex:
             ui.notify(f"Failed to load: {ex}", type="negative")
 
-    def download_png() -> None:
-        ui.download(model.render_png_bytes(show_numbers=model.show_numbers), filename="crochet_pattern.png")
-
-    def download_pdf() -> None:
-        ui.download(model.render_pdf_bytes(show_numbers=model.show_numbers), filename="crochet_pattern.pdf")
+    # Rendering runs on a worker thread (on a copy, since drawing may continue meanwhile)
+    # so pointer events are not stuck behind PIL/ReportLab.
+    async def download_png() -> None:
+        snap = model.export_copy()
+        data = await asyncio.to_thread(snap.render_png_bytes, show_numbers=model.show_numbers)
+        ui.download(data, filename="crochet_pattern.png")
+
+    async def download_pdf() -> None:
+        snap = model.export_copy()
+        data = await asyncio.to_thread(snap.render_pdf_bytes, show_numbers=model.show_numbers)
+        ui.download(data, filename="crochet_pattern.pdf")
 
     # Layout
     with ui.row().classes("w-full"):
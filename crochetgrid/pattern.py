@@ -17,13 +17,42 @@ Controls
 
 from __future__ import annotations
 
+import base64
 import json
 import os
-import re
+import zlib
 import tkinter as tk
+from collections import OrderedDict
+from functools import lru_cache
 from tkinter import filedialog, messagebox, colorchooser
 
-HEX_RE = re.compile(r"^#([0-9a-fA-F]{6})$")
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont, ImageTk
+
+try:
+    from scipy import ndimage
+except ImportError:  # optional: bucket fill falls back to a scanline fill
+    ndimage = None
+
+try:
+    from numba import njit
+except ImportError:  # optional: compiles that scanline fill
+    njit = None
+
+HEX_DIGITS = frozenset("0123456789abcdefABCDEF")
+
+# Cells repainted since the last full redraw are drawn as rectangles over the grid
+# image; past this many, the next repaint re-blits the image instead
+MAX_CELL_ITEMS = 2000
+
+# A patch stores an int32 row, an int32 col and a uint8 index per changed cell; past
+# 1/9 of the grid a full uint8 snapshot is smaller
+PATCH_BYTES_PER_CELL = 9
+
+# The grid image is drawn in tiles of about TILE_PX square; the most recently used
+# tiles are kept and reused while their cells are unchanged
+TILE_PX = 512
+TILE_CACHE_SIZE = 64
 
 DEFAULT_PALETTE = [
     "#000000",  # black
@@ -39,17 +68,100 @@ DEFAULT_PALETTE = [
 ]
 
 
+@lru_cache(maxsize=512)  # hit on every paint/fill with the same handful of colors
 def normalize_hex(s: str) -> str | None:
     s = (s or "").strip()
     if not s:
         return None
     if not s.startswith("#"):
         s = "#" + s
-    if HEX_RE.match(s):
+    if len(s) == 7 and HEX_DIGITS.issuperset(s[1:]):
         return s.upper()
     return None
 
 
+def hex_to_rgb(s: str) -> tuple[int, int, int]:
+    # s must already be normalized (#RRGGBB)
+    return int(s[1:3], 16), int(s[3:5], 16), int(s[5:7], 16)
+
+
+def _scanline_fill(mask: np.ndarray, r: int, c: int) -> np.ndarray:
+    # Scanline flood fill with an explicit array stack (no tuples), so numba can compile it
+    rcount, ccount = mask.shape
+    region = np.zeros((rcount, ccount), dtype=np.bool_)
+    # each push seeds a run next to a filled span: at most 2 per cell, plus the start
+    stack = np.empty((2 * rcount * ccount + 1, 2), dtype=np.int32)
+    stack[0, 0] = r
+    stack[0, 1] = c
+    top = 1
+    while top:
+        top -= 1
+        y = stack[top, 0]
+        x = stack[top, 1]
+        if region[y, x] or not mask[y, x]:
+            continue
+        # Extend to the whole horizontal run, then seed the runs above and below it
+        lo = x
+        while lo > 0 and mask[y, lo - 1]:
+            lo -= 1
+        hi = x
+        while hi < ccount - 1 and mask[y, hi + 1]:
+            hi += 1
+        region[y, lo:hi + 1] = True
+        for ny in (y - 1, y + 1):
+            if 0 <= ny < rcount:
+                x = lo
+                while x <= hi:
+                    if mask[ny, x] and not region[ny, x]:
+                        stack[top, 0] = ny
+                        stack[top, 1] = x
+                        top += 1
+                        while x <= hi and mask[ny, x]:
+                            x += 1
+                    x += 1
+    return region
+
+
+if njit is not None:
+    _scanline_fill = njit(cache=True)(_scanline_fill)
+
+
+def flood_region(mask: np.ndarray, r: int, c: int) -> np.ndarray:
+    # Boolean mask of the 4-connected True region of `mask` that contains (r, c)
+    if ndimage is not None:
+        labels, _ = ndimage.label(mask)  # default structure is 4-connectivity
+        return labels == labels[r, c]
+    return _scanline_fill(mask, r, c)
+
+
+def line_cells(r0: int, c0: int, r1: int, c1: int) -> list[tuple[int, int]]:
+    # Bresenham line of grid cells from (r0, c0) to (r1, c1), both ends included
+    dr, dc = abs(r1 - r0), abs(c1 - c0)
+    sr = 1 if r1 > r0 else -1
+    sc = 1 if c1 > c0 else -1
+    err = dc - dr
+    cells = [(r0, c0)]
+    while (r0, c0) != (r1, c1):
+        e2 = 2 * err
+        if e2 > -dr:
+            err -= dr
+            c0 += sc
+        if e2 < dc:
+            err += dc
+            r0 += sr
+        cells.append((r0, c0))
+    return cells
+
+
+@lru_cache(maxsize=None)
+def export_font(size: int) -> ImageFont.FreeTypeFont | ImageFont.ImageFont:
+    # Resolving a TrueType font hits the filesystem; do it once per size
+    try:
+        return ImageFont.truetype("DejaVuSans.ttf", size)
+    except Exception:
+        return ImageFont.load_default()
+
+
 def safe_basename(path: str) -> str:
     try:
         return os.path.basename(path)
@@ -83,23 +195,67 @@ class CrochetGridApp(tk.Tk):
         self.export_cell_px = tk.IntVar(value=30)
         self.export_margin_px = tk.IntVar(value=60)
 
-        # Data: None means "use background"
-        self.grid_data: list[list[str | None]] = []
+        # Data: one palette index per cell; index 0 (None) means "use background"
+        self.grid = np.zeros((0, 0), dtype=np.uint8)
+        self._palette_hex: list[str | None] = [None]
+        self._palette_idx: dict[str, int] = {}
+        self._palette_rgb = np.zeros((256, 3), dtype=np.uint8)  # row 0 tracks the background
+
+        # Parsed bg_color / active_color, re-parsed on every write instead of per cell
+        self._bg_hex = "#FFFFFF"
+        self._active_hex: str | None = None
+        self.bg_color.trace_add("write", self._sync_bg_color)
+        self.active_color.trace_add("write", self._sync_active_color)
+        self._sync_bg_color()
+        self._sync_active_color()
+
+        # Plain-attribute mirrors of the vars read on every redraw / mouse event
+        self._shadow(self.cell_px, "_cell_px_val")
+        self._shadow(self.mode, "_mode_val")
+        self._shadow(self.origin, "_origin_val")
+        self._shadow(self.show_numbers_editor, "_show_numbers_val")
 
         # Undo/Redo
         self.undo_stack: list[dict] = []
         self.redo_stack: list[dict] = []
         self.max_undo = 60
         self._action_open = False  # so drag paints become 1 undo step
+        self._action_base: np.ndarray | None = None
 
         # UI state
         self._is_dragging = False
+        self._pending_points: list[tuple[int, int, str | None]] = []  # queued drag (x, y, forced_mode)
+        self._drag_flush_id: str | None = None
+        self._last_cell: tuple[int, int] | None = None  # last cell the current stroke touched
+        self._grid_drawn = False
+        self._cell_items: dict[tuple[int, int], int] = {}  # (r, c) -> canvas rectangle id
+        # (tile_r, tile_c) -> (cell px, one-pixel-per-cell RGB it was built from, image)
+        self._tiles: OrderedDict[tuple[int, int], tuple[int, np.ndarray, ImageTk.PhotoImage]] = OrderedDict()
+        self._shown_tiles: list[ImageTk.PhotoImage] = []  # keeps on-canvas tiles alive past eviction
+        self._render_buf = np.empty(0, dtype=np.uint8)  # reused per-redraw RGB scratch
+        self._row_label_ids: list[int] = []
+        self._col_label_ids: list[int] = []
+        self._label_layout: tuple | None = None
+        self._numbering_key: tuple | None = None  # (grid shape, origin) _numbering_maps was built for
+        self._numbering_maps: tuple[list[int], list[int]] = ([], [])
 
         # Build UI
         self._build_ui()
         self._init_grid()
 
     # ---------------- UI ----------------
+    def _shadow(self, var: tk.Variable, attr: str) -> None:
+        # Mirror var into a plain attribute on every write, skipping the Tcl round trip
+        # that var.get() costs in hot paths
+        def sync(*_: object) -> None:
+            try:
+                setattr(self, attr, var.get())
+            except tk.TclError:
+                pass  # half-typed spinbox value; keep the last good one
+
+        var.trace_add("write", sync)
+        sync()
+
     def _on_canvas_motion(self, e: tk.Event) -> None:
         cell = self._cell_from_xy(e.x, e.y)
         if cell is None:
@@ -111,12 +267,11 @@ class CrochetGridApp(tk.Tk):
         # Convert to user-facing numbering based on origin choice:
         # - Rows: 1..N from bottom to top
         # - Cols: depends on bottom-left vs bottom-right
-        total_rows = len(self.grid_data)
-        total_cols = len(self.grid_data[0]) if self.grid_data else 0
+        total_rows, total_cols = self.grid.shape
 
         row_num = total_rows - r  # top row -> N, bottom row -> 1
 
-        if self.origin.get() == "bottom_left":
+        if self._origin_val == "bottom_left":
             col_num = c + 1
         else:
             col_num = total_cols - c
@@ -166,9 +321,25 @@ class CrochetGridApp(tk.Tk):
                 delta = -1 if getattr(e, "num", 0) == 4 else 1
             self.left_canvas.yview_scroll(delta, "units")
 
-        self.left_canvas.bind_all("<MouseWheel>", _on_mousewheel)
-        self.left_canvas.bind_all("<Button-4>", _on_mousewheel)
-        self.left_canvas.bind_all("<Button-5>", _on_mousewheel)
+        # Only grab the wheel while the pointer is over the panel, so scrolling (and the
+        # per-event handler cost) never leaks into the drawing canvas
+        wheel_events = ("<MouseWheel>", "<Button-4>", "<Button-5>")
+
+        def _grab_wheel(_: tk.Event) -> None:
+            for seq in wheel_events:
+                self.left_canvas.bind_all(seq, _on_mousewheel)
+
+        def _release_wheel(e: tk.Event) -> None:
+            # <Leave> also fires when moving onto a child widget; keep the grab then
+            under = self.winfo_containing(e.x_root, e.y_root)
+            panel = str(left_outer)
+            if under is not None and (str(under) == panel or str(under).startswith(panel + ".")):
+                return
+            for seq in wheel_events:
+                self.left_canvas.unbind_all(seq)
+
+        left_outer.bind("<Enter>", _grab_wheel)
+        left_outer.bind("<Leave>", _release_wheel)
 
         # Main area (right)
         main = tk.Frame(self, padx=10, pady=10)
@@ -335,18 +506,25 @@ class CrochetGridApp(tk.Tk):
 
     # ---------------- Undo / Redo ----------------
 
+    # Undo entries are either a full "snapshot" (resize, background change, or an
+    # action touching so many cells that a patch would be bigger) or a cell-level
+    # "patch": the rows/cols of the cells an action changed, their previous palette
+    # indices and the background at the time. Undoing a patch swaps those values
+    # back in and pushes the values it replaced, so redo uses the same representation.
+
     def _snapshot(self) -> dict:
-        # Deep copy grid_data
-        cells = [row[:] for row in self.grid_data]
+        # Palette indices stay valid across undo entries (see _compact_palette)
+        cells = self.grid.copy()
         return {
-            "rows": len(cells),
-            "cols": len(cells[0]) if cells else 0,
-            "background": normalize_hex(self.bg_color.get()) or "#FFFFFF",
+            "kind": "snapshot",
+            "rows": cells.shape[0],
+            "cols": cells.shape[1],
+            "background": self._bg_hex,
             "cells": cells,
         }
 
-    def _push_undo(self) -> None:
-        self.undo_stack.append(self._snapshot())
+    def _push_undo(self, entry: dict | None = None) -> None:
+        self.undo_stack.append(entry or self._snapshot())
         if len(self.undo_stack) > self.max_undo:
             self.undo_stack = self.undo_stack[-self.max_undo :]
         self.redo_stack.clear()
@@ -362,24 +540,42 @@ class CrochetGridApp(tk.Tk):
         self.cols.set(cols)
         self.bg_color.set(bg)
         self.bg_preview.configure(bg=bg)
-        self.grid_data = [row[:] for row in cells]
+        self.grid = cells.copy()
         self.redraw()
 
+    def _apply_undo_entry(self, entry: dict) -> dict:
+        # Apply an undo/redo entry and return the entry that reverses it
+        if entry["kind"] == "patch":
+            rr, cc = entry["rr"], entry["cc"]
+            inverse = {
+                "kind": "patch",
+                "rr": rr,
+                "cc": cc,
+                "background": self._bg_hex,
+                "cells": self.grid[rr, cc],
+            }
+            self.grid[rr, cc] = entry["cells"]
+            if entry["background"] != inverse["background"]:
+                self.bg_color.set(entry["background"])
+                self.redraw()
+            else:
+                self._redraw_cells(list(zip(rr.tolist(), cc.tolist())))
+            return inverse
+        inverse = self._snapshot()
+        self._restore(entry)
+        return inverse
+
     def undo(self) -> None:
         if not self.undo_stack:
             return
-        self.redo_stack.append(self._snapshot())
-        snap = self.undo_stack.pop()
-        self._restore(snap)
+        self.redo_stack.append(self._apply_undo_entry(self.undo_stack.pop()))
         self.status.set("Undo.")
         self._update_undo_redo_buttons()
 
     def redo(self) -> None:
         if not self.redo_stack:
             return
-        self.undo_stack.append(self._snapshot())
-        snap = self.redo_stack.pop()
-        self._restore(snap)
+        self.undo_stack.append(self._apply_undo_entry(self.redo_stack.pop()))
         self.status.set("Redo.")
         self._update_undo_redo_buttons()
 
@@ -389,19 +585,99 @@ class CrochetGridApp(tk.Tk):
             self.redo_btn.configure(state=("normal" if self.redo_stack else "disabled"))
 
     def _begin_action(self) -> None:
-        # Start a single undoable action (for drag painting)
+        # Start a single undoable action (for drag painting); the cells it changes are
+        # found by diffing against this copy when the action ends
         if not self._action_open:
-            self._push_undo()
+            self._action_base = self.grid.copy()
+            self._action_bg = self._bg_hex
             self._action_open = True
 
     def _end_action(self) -> None:
+        if not self._action_open:
+            return
         self._action_open = False
+        base, self._action_base = self._action_base, None
+        rr, cc = np.nonzero(base != self.grid)
+        if not rr.size:
+            return
+        if rr.size * PATCH_BYTES_PER_CELL >= base.size:
+            # A patch this large (big fills, clear) costs more than the whole grid:
+            # keep the pre-action grid itself as a checkpoint instead
+            self._push_undo({
+                "kind": "snapshot",
+                "rows": base.shape[0],
+                "cols": base.shape[1],
+                "background": self._action_bg,
+                "cells": base,
+            })
+            return
+        rr, cc = rr.astype(np.int32), cc.astype(np.int32)
+        self._push_undo(
+            {"kind": "patch", "rr": rr, "cc": cc, "background": self._action_bg, "cells": base[rr, cc]}
+        )
+
+    # ---------------- Palette ----------------
+
+    def _intern(self, color: str | None) -> int:
+        # Palette index for a normalized hex color (None -> 0, the background)
+        if color is None:
+            return 0
+        idx = self._palette_idx.get(color)
+        if idx is None:
+            if len(self._palette_hex) > 255:
+                self._compact_palette()
+            idx = len(self._palette_hex)
+            self._palette_hex.append(color)
+            self._palette_idx[color] = idx
+            self._palette_rgb[idx] = hex_to_rgb(color)
+        return idx
+
+    def _set_palette(self, palette: list[str | None]) -> None:
+        self._palette_hex = palette
+        self._palette_idx = {v: i for i, v in enumerate(palette) if v is not None}
+        for i, v in enumerate(palette[1:], 1):
+            self._palette_rgb[i] = hex_to_rgb(v)
+
+    def _compact_palette(self) -> None:
+        # Drop colors no longer referenced by the grid or the undo history, renumbering
+        # everything that holds palette indices
+        entries = self.undo_stack + self.redo_stack
+        used = np.zeros(256, dtype=bool)
+        used[0] = True
+        used[self.grid] = True
+        if self._action_base is not None:
+            used[self._action_base] = True
+        for entry in entries:
+            used[entry["cells"]] = True
+        if used.all():
+            # the history pins every slot; keep only the colors on screen
+            self.undo_stack.clear()
+            self.redo_stack.clear()
+            self._update_undo_redo_buttons()
+            entries = []
+            used[:] = False
+            used[0] = True
+            used[self.grid] = True
+            if self._action_base is not None:
+                used[self._action_base] = True
+            if used.all():
+                raise ValueError("A pattern can use at most 255 colors.")
+
+        keep = np.flatnonzero(used)
+        remap = np.zeros(256, dtype=np.uint8)
+        remap[keep] = np.arange(len(keep), dtype=np.uint8)
+        self.grid = remap[self.grid]
+        if self._action_base is not None:
+            self._action_base = remap[self._action_base]
+        for entry in entries:
+            entry["cells"] = remap[entry["cells"]]
+        self._set_palette([self._palette_hex[i] for i in keep])
 
     # ---------------- Grid / Rendering ----------------
 
     def _init_grid(self) -> None:
         r, c = self.rows.get(), self.cols.get()
-        self.grid_data = [[None for _ in range(c)] for _ in range(r)]
+        self.grid = np.zeros((r, c), dtype=np.uint8)
         self.undo_stack.clear()
         self.redo_stack.clear()
         self._update_undo_redo_buttons()
@@ -415,35 +691,37 @@ class CrochetGridApp(tk.Tk):
 
         self._push_undo()
 
-        old = self.grid_data
-        old_r = len(old)
-        old_c = len(old[0]) if old else 0
+        old = self.grid
+        old_r, old_c = old.shape
 
-        new_grid = [[None for _ in range(c)] for _ in range(r)]
-        for rr in range(min(r, old_r)):
-            for cc in range(min(c, old_c)):
-                new_grid[rr][cc] = old[rr][cc]
+        keep_r, keep_c = min(r, old_r), min(c, old_c)
+        new_grid = np.zeros((r, c), dtype=np.uint8)
+        new_grid[:keep_r, :keep_c] = old[:keep_r, :keep_c]
 
-        self.grid_data = new_grid
+        self.grid = new_grid
         self.redraw()
         self.status.set(f"Grid resized to {r}x{c}.")
 
     def on_clear(self) -> None:
-        self._push_undo()
-        for r in range(len(self.grid_data)):
-            for c in range(len(self.grid_data[0])):
-                self.grid_data[r][c] = None
+        self._begin_action()
+        self.grid.fill(0)
+        self._end_action()
         self.redraw()
         self.status.set("Cleared to background.")
 
     def redraw(self) -> None:
-        self.canvas.delete("all")
-        if not self.grid_data:
+        # Number labels persist across redraws (see _layout_labels); everything else is
+        # tagged "grid" and rebuilt
+        self.canvas.delete("grid")
+        self._cell_items.clear()
+        self._shown_tiles = []
+        self._grid_drawn = False
+        if not self.grid.size:
+            self._layout_labels(None)
             return
 
-        rcount = len(self.grid_data)
-        ccount = len(self.grid_data[0])
-        cell = self.cell_px.get()
+        rcount, ccount = self.grid.shape
+        cell = self._cell_px_val
 
         pad = 20
         cw = max(self.canvas.winfo_width(), 1)
@@ -453,7 +731,7 @@ class CrochetGridApp(tk.Tk):
         grid_h = rcount * cell
 
         # Reserve space for numbers overlay if enabled
-        num_pad = int(cell * 1.2) if self.show_numbers_editor.get() else 0
+        num_pad = int(cell * 1.2) if self._show_numbers_val else 0
 
         x0 = max((cw - grid_w) // 2, pad + num_pad)
         y0 = max((ch - grid_h) // 2, pad + num_pad)
@@ -461,48 +739,129 @@ class CrochetGridApp(tk.Tk):
         self._grid_origin = (x0, y0)
         self._grid_cell = cell
 
-        bg = normalize_hex(self.bg_color.get()) or "#FFFFFF"
+        bg = self._bg_hex
         self.bg_preview.configure(bg=bg)
-
-        # Draw cells
-        for r in range(rcount):
-            for c in range(ccount):
-                x1 = x0 + c * cell
-                y1 = y0 + r * cell
-                x2 = x1 + cell
-                y2 = y1 + cell
-                fill = self.grid_data[r][c] or bg
-                self.canvas.create_rectangle(x1, y1, x2, y2, fill=fill, outline="#C9C9C9")
+        self._drawn_bg = bg
+
+        # Draw cells: one pixel per cell, scaled up and blitted as canvas images, one per
+        # tile that reaches into the visible canvas
+        vis_r = min(rcount, max(0, -(-(ch - y0) // cell)))
+        vis_c = min(ccount, max(0, -(-(cw - x0) // cell)))
+        need = vis_r * vis_c * 3
+        if self._render_buf.size < need:
+            self._render_buf = np.empty(need, dtype=np.uint8)
+        rgb = self._render_buf[:need].reshape(vis_r, vis_c, 3)
+        # uint8 indices can't leave the 256-row table, so mode="clip" is exact and lets
+        # take() write straight into the buffer
+        np.take(self._palette_rgb, self.grid[:vis_r, :vis_c], axis=0, out=rgb, mode="clip")
+        tile = max(1, TILE_PX // cell)
+        for r0 in range(0, vis_r, tile):
+            for c0 in range(0, vis_c, tile):
+                photo = self._tile_photo((r0 // tile, c0 // tile), rgb[r0:r0 + tile, c0:c0 + tile], cell)
+                self._shown_tiles.append(photo)
+                self.canvas.create_image(x0 + c0 * cell, y0 + r0 * cell, image=photo, anchor="nw", tags="grid")
+        self._grid_drawn = True
+
+        # Grid lines: one zig-zag polyline for all vertical rules and one for all horizontal
+        # rules; the connecting runs lie on the outer edge, under the border
+        xs = [x0 + c * cell for c in range(ccount + 1)]
+        ys = [y0 + r * cell for r in range(rcount + 1)]
+        vertical: list[int] = []
+        for c, x in enumerate(xs):
+            ends = (y0, y0 + grid_h) if c % 2 == 0 else (y0 + grid_h, y0)
+            vertical += (x, ends[0], x, ends[1])
+        horizontal: list[int] = []
+        for r, y in enumerate(ys):
+            ends = (x0, x0 + grid_w) if r % 2 == 0 else (x0 + grid_w, x0)
+            horizontal += (ends[0], y, ends[1], y)
+        self.canvas.create_line(*vertical, fill="#C9C9C9", tags=("grid", "gridline"))
+        self.canvas.create_line(*horizontal, fill="#C9C9C9", tags=("grid", "gridline"))
 
         # Border
-        self.canvas.create_rectangle(x0, y0, x0 + grid_w, y0 + grid_h, outline="#888", width=2)
+        self.canvas.create_rectangle(
+            x0, y0, x0 + grid_w, y0 + grid_h, outline="#888", width=2, tags=("grid", "border")
+        )
 
         # Numbers overlay
-        if self.show_numbers_editor.get():
-            row_nums, col_nums = self._get_numbering_maps()
-            font = ("Helvetica", max(8, int(cell * 0.35)))
+        if self._show_numbers_val:
+            self._layout_labels((x0, y0, cell, rcount, ccount, self._origin_val))
+        else:
+            self._layout_labels(None)
 
-            # Column numbers above (aligned to columns)
-            for c in range(ccount):
-                label = str(col_nums[c])
-                cx = x0 + c * cell + cell / 2
-                cy = y0 - cell * 0.6
-                self.canvas.create_text(cx, cy, text=label, font=font, fill="#111")
+    def _layout_labels(self, layout: tuple | None) -> None:
+        # Row/column number text items are created once and moved/relabelled in place;
+        # nothing is touched while the layout (origin, cell size, grid size) is unchanged
+        if layout == self._label_layout:
+            return
+        self._label_layout = layout
+        if layout is None:
+            self.canvas.itemconfigure("label", state="hidden")
+            return
 
-            # Row numbers left (row 1 at bottom)
-            for r in range(rcount):
-                label = str(row_nums[rcount - 1 - r])
-                cx = x0 - cell * 0.6
-                cy = y0 + r * cell + cell / 2
-                self.canvas.create_text(cx, cy, text=label, font=font, fill="#111")
+        x0, y0, cell, rcount, ccount, _ = layout
+        row_nums, col_nums = self._get_numbering_maps()
+        font = ("Helvetica", max(8, int(cell * 0.35)))
+        for ids, count in ((self._col_label_ids, ccount), (self._row_label_ids, rcount)):
+            while len(ids) < count:
+                ids.append(self.canvas.create_text(0, 0, fill="#111", tags="label"))
+            while len(ids) > count:
+                self.canvas.delete(ids.pop())
+
+        # Column numbers above (aligned to columns)
+        for c, item in enumerate(self._col_label_ids):
+            self.canvas.coords(item, x0 + c * cell + cell / 2, y0 - cell * 0.6)
+            self.canvas.itemconfigure(item, text=str(col_nums[c]), font=font, state="normal")
+
+        # Row numbers left (row 1 at bottom)
+        for r, item in enumerate(self._row_label_ids):
+            self.canvas.coords(item, x0 - cell * 0.6, y0 + r * cell + cell / 2)
+            self.canvas.itemconfigure(item, text=str(row_nums[rcount - 1 - r]), font=font, state="normal")
+
+    def _tile_photo(self, key: tuple[int, int], small: np.ndarray, cell: int) -> ImageTk.PhotoImage:
+        # small: the tile's one-pixel-per-cell RGB; a cached tile built from the same
+        # pixels at the same cell size is reused as-is
+        hit = self._tiles.get(key)
+        if hit is not None and hit[0] == cell and np.array_equal(hit[1], small):
+            self._tiles.move_to_end(key)
+            return hit[2]
+
+        h, w = small.shape[:2]
+        img = Image.fromarray(small, "RGB").resize((w * cell, h * cell), Image.Resampling.NEAREST)
+        photo = ImageTk.PhotoImage(img)
+        self._tiles[key] = (cell, small.copy(), photo)
+        self._tiles.move_to_end(key)
+        while len(self._tiles) > TILE_CACHE_SIZE:
+            self._tiles.popitem(last=False)
+        return photo
+
+    def _redraw_cells(self, cells: list[tuple[int, int]]) -> None:
+        # Repaint just these cells, as rectangles over the grid image, instead of
+        # rebuilding the whole canvas
+        if not self._grid_drawn or len(self._cell_items) + len(cells) > MAX_CELL_ITEMS:
+            self.redraw()
+            return
+
+        x0, y0 = self._grid_origin
+        cell = self._grid_cell
+        bg = self._drawn_bg
+        for r, c in cells:
+            fill = self._palette_hex[self.grid[r, c]] or bg
+            item = self._cell_items.get((r, c))
+            if item is None:
+                x1 = x0 + c * cell
+                y1 = y0 + r * cell
+                item = self.canvas.create_rectangle(x1, y1, x1 + cell, y1 + cell, fill=fill, outline="", tags="grid")
+                self.canvas.tag_lower(item, "gridline")
+                self._cell_items[(r, c)] = item
+            else:
+                self.canvas.itemconfigure(item, fill=fill)
 
     def _cell_from_xy(self, x: int, y: int) -> tuple[int, int] | None:
-        if not self.grid_data:
+        if not self.grid.size:
             return None
         x0, y0 = getattr(self, "_grid_origin", (0, 0))
-        cell = getattr(self, "_grid_cell", self.cell_px.get())
-        rcount = len(self.grid_data)
-        ccount = len(self.grid_data[0])
+        cell = getattr(self, "_grid_cell", self._cell_px_val)
+        rcount, ccount = self.grid.shape
 
         gx = x - x0
         gy = y - y0
@@ -516,6 +875,13 @@ class CrochetGridApp(tk.Tk):
 
     # ---------------- Colors ----------------
 
+    def _sync_bg_color(self, *_: object) -> None:
+        self._bg_hex = normalize_hex(self.bg_color.get()) or "#FFFFFF"
+        self._palette_rgb[0] = hex_to_rgb(self._bg_hex)
+
+    def _sync_active_color(self, *_: object) -> None:
+        self._active_hex = normalize_hex(self.active_color.get())
+
     def set_active_color(self, color: str) -> None:
         col = normalize_hex(color)
         if not col:
@@ -557,62 +923,52 @@ class CrochetGridApp(tk.Tk):
     # ---------------- Actions: paint/erase/fill/eyedropper ----------------
 
     def _current_paint_color(self) -> str | None:
-        return normalize_hex(self.active_color.get())
+        return self._active_hex
 
     def _get_cell_color(self, r: int, c: int) -> str:
-        bg = normalize_hex(self.bg_color.get()) or "#FFFFFF"
-        return self.grid_data[r][c] or bg
+        bg = self._bg_hex
+        return self._palette_hex[self.grid[r, c]] or bg
 
     def _set_cell_color(self, r: int, c: int, color: str | None) -> None:
-        self.grid_data[r][c] = color
+        self.grid[r, c] = self._intern(color)
 
-    def _bucket_fill(self, start_r: int, start_c: int, new_color: str | None) -> None:
+    def _bucket_fill(self, start_r: int, start_c: int, new_color: str | None) -> np.ndarray | None:
+        # Returns the mask of filled cells (None if nothing changed)
         # Flood fill on *effective* color (cell or bg)
-        rcount = len(self.grid_data)
-        ccount = len(self.grid_data[0])
+        bg = self._bg_hex
         target = self._get_cell_color(start_r, start_c)
-        replacement = (new_color or (normalize_hex(self.bg_color.get()) or "#FFFFFF"))
+        replacement = (new_color or bg)
 
         if target == replacement:
-            return
-
-        stack = [(start_r, start_c)]
-        seen = set()
-
-        while stack:
-            r, c = stack.pop()
-            if (r, c) in seen:
-                continue
-            seen.add((r, c))
-
-            if self._get_cell_color(r, c) != target:
-                continue
-
-            # If replacement equals background, store None; else store replacement
-            bg = normalize_hex(self.bg_color.get()) or "#FFFFFF"
-            self._set_cell_color(r, c, None if replacement == bg else replacement)
+            return None
 
-            if r > 0:
-                stack.append((r - 1, c))
-            if r < rcount - 1:
-                stack.append((r + 1, c))
-            if c > 0:
-                stack.append((r, c - 1))
-            if c < ccount - 1:
-                stack.append((r, c + 1))
+        # If replacement equals background, store None; else store replacement
+        # (interned first: a palette compaction renumbers the indices)
+        new_idx = self._intern(None if replacement == bg else replacement)
+        # Every palette index whose effective color is the target (painted-bg == unpainted)
+        targets = [i for i, v in enumerate(self._palette_hex) if (v or bg) == target]
+        region = flood_region(np.isin(self.grid, targets), start_r, start_c)
+        self.grid[region] = new_idx
+        return region
 
     def _apply_tool_at(self, x: int, y: int, forced_mode: str | None = None) -> None:
         cell = self._cell_from_xy(x, y)
+        self._last_cell = cell
         if cell is None:
             return
-        r, c = cell
-        mode = forced_mode or self.mode.get()
+        cells = self._apply_tool(cell[0], cell[1], forced_mode)
+        if cells:
+            self._redraw_cells(cells)
+
+    def _apply_tool(self, r: int, c: int, forced_mode: str | None = None) -> list[tuple[int, int]]:
+        # Applies the tool to cell (r, c); returns the cells that need repainting
+        mode = forced_mode or self._mode_val
 
         if mode == "eyedropper":
             picked = self._get_cell_color(r, c)
             self.set_active_color(picked)
             self.status.set(f"Picked {picked}")
-            return
+            return []
 
         if mode in ("paint", "erase", "fill"):
             self._begin_action()
@@ -620,20 +976,60 @@ class CrochetGridApp(tk.Tk):
         if mode == "paint":
             col = self._current_paint_color()
             if not col:
-                return
-            self._set_cell_color(r, c, col)
+                return []
+            try:
+                self._set_cell_color(r, c, col)
+            except ValueError as e:
+                messagebox.showerror("Too many colors", str(e))
+                return []
+            return [(r, c)]
         elif mode == "erase":
             self._set_cell_color(r, c, None)
+            return [(r, c)]
         elif mode == "fill":
             col = self._current_paint_color()
             if not col:
-                return
-            self._bucket_fill(r, c, col)
-
-        self.redraw()
+                return []
+            try:
+                region = self._bucket_fill(r, c, col)
+            except ValueError as e:
+                messagebox.showerror("Too many colors", str(e))
+                return []
+            if region is not None:
+                return np.argwhere(region).tolist()
+        return []
+
+    # Motion events arrive much faster than the screen refreshes, so drag points are
+    # queued and applied together, with a single repaint, once Tk goes idle
+
+    def _queue_drag(self, x: int, y: int, forced_mode: str | None = None) -> None:
+        self._pending_points.append((x, y, forced_mode))
+        if self._drag_flush_id is None:
+            self._drag_flush_id = self.after_idle(self._flush_drag)
+
+    def _flush_drag(self) -> None:
+        if self._drag_flush_id is not None:
+            self.after_cancel(self._drag_flush_id)
+            self._drag_flush_id = None
+        points, self._pending_points = self._pending_points, []
+        dirty: dict[tuple[int, int], None] = {}
+        for x, y, forced_mode in points:
+            cell = self._cell_from_xy(x, y)
+            if cell is None or cell == self._last_cell:
+                self._last_cell = cell
+                continue
+            # Walk every cell between the previous point and this one, so fast drags
+            # don't leave gaps
+            path = line_cells(*self._last_cell, *cell)[1:] if self._last_cell else [cell]
+            for r, c in path:
+                dirty.update(dict.fromkeys(map(tuple, self._apply_tool(r, c, forced_mode))))
+            self._last_cell = cell
+        if dirty:
+            self._redraw_cells(list(dirty))
 
     # Left-click behavior (respects chosen tool)
     def _on_left_down(self, e: tk.Event) -> None:
+        self._flush_drag()
         self._is_dragging = True
         self._apply_tool_at(e.x, e.y)
 
@@ -641,37 +1037,42 @@ class CrochetGridApp(tk.Tk):
         if not self._is_dragging:
             return
         # Dragging makes sense for paint/erase; for fill/eyedropper do single action
-        if self.mode.get() in ("fill", "eyedropper"):
+        if self._mode_val in ("fill", "eyedropper"):
             return
-        self._apply_tool_at(e.x, e.y)
+        self._queue_drag(e.x, e.y)
 
     def _on_left_up(self, e: tk.Event) -> None:
+        self._flush_drag()
         self._is_dragging = False
         self._end_action()
 
     # Right-click quick erase (always)
     def _on_right_down(self, e: tk.Event) -> None:
+        self._flush_drag()
         self._is_dragging = True
         self._apply_tool_at(e.x, e.y, forced_mode="erase")
 
     def _on_right_drag(self, e: tk.Event) -> None:
         if not self._is_dragging:
             return
-        self._apply_tool_at(e.x, e.y, forced_mode="erase")
+        self._queue_drag(e.x, e.y, forced_mode="erase")
 
     def _on_right_up(self, e: tk.Event) -> None:
+        self._flush_drag()
         self._is_dragging = False
         self._end_action()
 
     # ---------------- JSON Save/Load ----------------
 
     def _to_json_obj(self) -> dict:
+        # v3: palette + zlib'd uint8 index grid instead of one hex string per cell
         return {
-            "version": 2,
-            "rows": len(self.grid_data),
-            "cols": len(self.grid_data[0]) if self.grid_data else 0,
-            "background": normalize_hex(self.bg_color.get()) or "#FFFFFF",
-            "cells": self.grid_data,
+            "version": 3,
+            "rows": self.grid.shape[0],
+            "cols": self.grid.shape[1],
+            "background": self._bg_hex,
+            "palette": self._palette_hex,
+            "grid_b64": base64.b64encode(zlib.compress(self.grid.tobytes())).decode("ascii"),
         }
 
     def save_json(self) -> None:
@@ -695,34 +1096,57 @@ class CrochetGridApp(tk.Tk):
                 obj = json.load(f)
 
             ver = int(obj.get("version", 1))
-            if ver not in (1, 2):
+            if ver not in (1, 2, 3):
                 raise ValueError("Unsupported JSON version.")
 
             rows = int(obj["rows"])
             cols = int(obj["cols"])
             bg = normalize_hex(obj.get("background", "#FFFFFF")) or "#FFFFFF"
-            cells = obj["cells"]
-
-            if len(cells) != rows or any(len(row) != cols for row in cells):
-                raise ValueError("Cell data does not match rows/cols.")
-
-            norm_cells: list[list[str | None]] = []
-            for r in range(rows):
-                out_row = []
-                for c in range(cols):
-                    v = cells[r][c]
-                    if v is None:
-                        out_row.append(None)
-                    else:
-                        nv = normalize_hex(v)
-                        out_row.append(nv if nv else None)
-                norm_cells.append(out_row)
+
+            # Fresh palette: the old undo history is discarded below anyway
+            palette: list[str | None] = [None]
+            palette_idx: dict[str, int] = {}
+
+            def intern(v: object) -> int:
+                nv = normalize_hex(v) if v is not None else None
+                if not nv:
+                    return 0
+                idx = palette_idx.get(nv)
+                if idx is None:
+                    if len(palette) > 255:
+                        raise ValueError("A pattern can use at most 255 colors.")
+                    idx = palette_idx[nv] = len(palette)
+                    palette.append(nv)
+                return idx
+
+            if ver >= 3:
+                raw = np.frombuffer(zlib.decompress(base64.b64decode(obj["grid_b64"])), dtype=np.uint8)
+                if raw.size != rows * cols:
+                    raise ValueError("Cell data does not match rows/cols.")
+                saved = obj["palette"]
+                if len(saved) > 256 or int(raw.max(initial=0)) >= len(saved):
+                    raise ValueError("Cell data references a color missing from the palette.")
+                # Re-intern the saved palette so duplicates/invalid entries collapse
+                remap = np.zeros(256, dtype=np.uint8)
+                for i, v in enumerate(saved[1:], 1):
+                    remap[i] = intern(v)
+                norm_cells = remap[raw.reshape(rows, cols)]
+            else:
+                cells = obj["cells"]
+                if len(cells) != rows or any(len(row) != cols for row in cells):
+                    raise ValueError("Cell data does not match rows/cols.")
+
+                norm_cells = np.zeros((rows, cols), dtype=np.uint8)
+                for r in range(rows):
+                    for c in range(cols):
+                        norm_cells[r, c] = intern(cells[r][c])
 
             self.rows.set(rows)
             self.cols.set(cols)
             self.bg_color.set(bg)
             self.bg_preview.configure(bg=bg)
-            self.grid_data = norm_cells
+            self.grid = norm_cells
+            self._set_palette(palette)
 
             self.undo_stack.clear()
             self.redo_stack.clear()
@@ -736,13 +1160,21 @@ class CrochetGridApp(tk.Tk):
     # ---------------- Numbering ----------------
 
     def _get_numbering_maps(self) -> tuple[list[int], list[int]]:
-        rcount = len(self.grid_data)
-        ccount = len(self.grid_data[0]) if self.grid_data else 0
+        # Shared by the editor labels and both exports; rebuilt only when the grid shape
+        # or the origin changes. Callers must not modify the returned lists.
+        key = (self.grid.shape, self._origin_val)
+        if self._numbering_key != key:
+            self._numbering_key = key
+            self._numbering_maps = self._compute_numbering_maps()
+        return self._numbering_maps
+
+    def _compute_numbering_maps(self) -> tuple[list[int], list[int]]:
+        rcount, ccount = self.grid.shape
 
         # row labels: 1..rows bottom->top; we place them by flipping during draw
         row_nums = list(range(1, rcount + 1))
 
-        if self.origin.get() == "bottom_left":
+        if self._origin_val == "bottom_left":
             col_nums = list(range(1, ccount + 1))      # left->right
         else:
             col_nums = list(range(ccount, 0, -1))      # left->right but numbers count down
@@ -751,13 +1183,7 @@ class CrochetGridApp(tk.Tk):
     # ---------------- Export ----------------
 
     def export_png(self) -> None:
-        try:
-            from PIL import Image, ImageDraw, ImageFont
-        except Exception:
-            messagebox.showerror("Missing dependency", "PNG export requires Pillow.\nInstall with: pip install pillow")
-            return
-
-        if not self.grid_data:
+        if not self.grid.size:
             return
 
         path = filedialog.asksaveasfilename(
@@ -768,12 +1194,10 @@ class CrochetGridApp(tk.Tk):
         if not path:
             return
 
-        rcount = len(self.grid_data)
-        ccount = len(self.grid_data[0])
+        rcount, ccount = self.grid.shape
         cell = int(self.export_cell_px.get())
         show_nums = bool(self.export_show_numbers.get())
         margin = int(self.export_margin_px.get()) if show_nums else 20
-        bg = normalize_hex(self.bg_color.get()) or "#FFFFFF"
 
         grid_w = ccount * cell
         grid_h = rcount * cell
@@ -783,22 +1207,19 @@ class CrochetGridApp(tk.Tk):
         img = Image.new("RGB", (img_w, img_h), "white")
         draw = ImageDraw.Draw(img)
 
-        try:
-            font = ImageFont.truetype("DejaVuSans.ttf", max(10, cell // 2))
-        except Exception:
-            font = ImageFont.load_default()
+        font = export_font(max(10, cell // 2))
 
         x0, y0 = margin, margin
 
-        # Cells
-        for r in range(rcount):
-            for c in range(ccount):
-                x1 = x0 + c * cell
-                y1 = y0 + r * cell
-                x2 = x1 + cell
-                y2 = y1 + cell
-                fill = self.grid_data[r][c] or bg
-                draw.rectangle([x1, y1, x2, y2], fill=fill, outline="#B0B0B0")
+        # Cells: one pixel per cell, scaled up in one step, then the grid lines on top
+        cells = Image.fromarray(np.take(self._palette_rgb, self.grid, axis=0, mode="clip"), "RGB")
+        img.paste(cells.resize((grid_w, grid_h), Image.Resampling.NEAREST), (x0, y0))
+        for c in range(ccount + 1):
+            x = x0 + c * cell
+            draw.line([(x, y0), (x, y0 + grid_h)], fill="#B0B0B0")
+        for r in range(rcount + 1):
+            y = y0 + r * cell
+            draw.line([(x0, y), (x0 + grid_w, y)], fill="#B0B0B0")
 
         draw.rectangle([x0, y0, x0 + grid_w, y0 + grid_h], outline="#333333", width=3)
 
@@ -834,7 +1255,7 @@ class CrochetGridApp(tk.Tk):
             messagebox.showerror("Missing dependency", "PDF export requires reportlab.\nInstall with: pip install reportlab")
             return
 
-        if not self.grid_data:
+        if not self.grid.size:
             return
 
         path = filedialog.asksaveasfilename(
@@ -845,10 +1266,8 @@ class CrochetGridApp(tk.Tk):
         if not path:
             return
 
-        rcount = len(self.grid_data)
-        ccount = len(self.grid_data[0])
+        rcount, ccount = self.grid.shape
         show_nums = bool(self.export_show_numbers.get())
-        bg = normalize_hex(self.bg_color.get()) or "#FFFFFF"
 
         page_w, page_h = letter
         margin = 36
@@ -870,19 +1289,33 @@ class CrochetGridApp(tk.Tk):
         c.setFont("Helvetica", 9)
         c.drawString(margin, page_h - margin + 8, "Crochet Pattern Grid Export")
 
-        for r in range(rcount):
-            for col in range(ccount):
-                pdf_x = x0 + col * cell
-                pdf_y = y0 + (rcount - 1 - r) * cell
-
-                fill = self.grid_data[r][col] or bg
-                r8 = int(fill[1:3], 16) / 255.0
-                g8 = int(fill[3:5], 16) / 255.0
-                b8 = int(fill[5:7], 16) / 255.0
-
-                c.setFillColorRGB(r8, g8, b8)
-                c.setStrokeColorRGB(0.75, 0.75, 0.75)
-                c.rect(pdf_x, pdf_y, cell, cell, fill=1, stroke=1)
+        # The most common color (usually the background) is one rectangle under the whole
+        # grid; every other color gets one fill color change (row 0 of _palette_rgb is the
+        # background) followed by all of its cells
+        counts = np.bincount(self.grid.ravel(), minlength=256)
+        dominant = int(counts.argmax())
+        r8, g8, b8 = (self._palette_rgb[dominant] / 255.0).tolist()
+        c.setFillColorRGB(r8, g8, b8)
+        c.rect(x0, y0, grid_w, grid_h, fill=1, stroke=0)
+        for idx in np.flatnonzero(counts).tolist():
+            if idx == dominant:
+                continue
+            r8, g8, b8 = (self._palette_rgb[idx] / 255.0).tolist()
+            c.setFillColorRGB(r8, g8, b8)
+            rr, cc = np.nonzero(self.grid == idx)
+            for r, col in zip(rr.tolist(), cc.tolist()):
+                c.rect(x0 + col * cell, y0 + (rcount - 1 - r) * cell, cell, cell, fill=1, stroke=0)
+
+        # Grid lines as a single path: each shared edge stroked once
+        lines = c.beginPath()
+        for r in range(rcount + 1):
+            lines.moveTo(x0, y0 + r * cell)
+            lines.lineTo(x0 + grid_w, y0 + r * cell)
+        for col in range(ccount + 1):
+            lines.moveTo(x0 + col * cell, y0)
+            lines.lineTo(x0 + col * cell, y0 + grid_h)
+        c.setStrokeColorRGB(0.75, 0.75, 0.75)
+        c.drawPath(lines, stroke=1, fill=0)
 
         c.setStrokeColorRGB(0.2, 0.2, 0.2)
         c.setLineWidth(2)
@@ -893,17 +1326,17 @@ class CrochetGridApp(tk.Tk):
             c.setFont("Helvetica", max(6, int(cell * 0.35)))
             c.setFillColorRGB(0.1, 0.1, 0.1)
 
-            for col in range(ccount):
-                label = str(col_nums[col])
-                tx = x0 + col * cell + cell * 0.5
-                ty = y0 + grid_h + cell * 0.15
-                c.drawCentredString(tx, ty, label)
-
-            for r in range(rcount):
-                label = str(row_nums[r])  # 1..rows bottom->top
-                tx = x0 - cell * 0.25
-                ty = y0 + (r * cell) + cell * 0.35
-                c.drawRightString(tx, ty, label)
+            # Loop invariants hoisted: one fixed y for the column labels, one fixed x for
+            # the row labels
+            col_x = x0 + cell * 0.5
+            col_y = y0 + grid_h + cell * 0.15
+            for col, label in enumerate(map(str, col_nums)):
+                c.drawCentredString(col_x + col * cell, col_y, label)
+
+            row_x = x0 - cell * 0.25
+            row_y = y0 + cell * 0.35
+            for r, label in enumerate(map(str, row_nums)):  # 1..rows bottom->top
+                c.drawRightString(row_x, row_y + r * cell, label)
 
         c.showPage()
         c.save()
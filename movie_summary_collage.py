@@ -8,24 +8,40 @@ Usage:
 
 Requirements:
   - ffmpeg and ffprobe installed and in PATH
-  - pip install pillow
+  - pip install pillow (only for collages of more than 32 frames)
 """
 
 import argparse
+import concurrent.futures
+import importlib
+import io
+import json
 import os
+import shutil
 import subprocess
 import sys
-import tempfile
 from pathlib import Path
-from typing import List
+from typing import TYPE_CHECKING, List
 
-from PIL import Image
+if TYPE_CHECKING:
+    from PIL import Image
 
 
 VIDEO_EXTENSIONS = {
     ".mp4", ".mkv", ".mov", ".avi", ".wmv", ".flv", ".webm", ".m4v"
 }
 
+# Above this many frames the collage is assembled with Pillow instead of an ffmpeg hstack
+MAX_HSTACK_INPUTS = 32
+
+
+def _require(name: str, pip_name: str):
+    # Import on first use so --help and the common ffmpeg-only path skip the cost
+    try:
+        return importlib.import_module(name)
+    except ImportError:
+        raise SystemExit(f"{name} required: pip install {pip_name}") from None
+
 
 def run_cmd(cmd: List[str]) -> subprocess.CompletedProcess:
     return subprocess.run(
@@ -36,18 +52,29 @@ def run_cmd(cmd: List[str]) -> subprocess.CompletedProcess:
     )
 
 
-def get_duration_seconds(video_path: Path) -> float:
+def probe_duration(video_path: Path) -> float:
+    # Duration in seconds; some containers only report it on the video stream
     cmd = [
         "ffprobe",
         "-v", "error",
-        "-show_entries", "format=duration",
-        "-of", "default=noprint_wrappers=1:nokey=1",
+        "-select_streams", "v:0",
+        "-show_entries", "format=duration:stream=duration",
+        "-of", "json",
         str(video_path),
     ]
     result = run_cmd(cmd)
     if result.returncode != 0:
         raise RuntimeError(result.stderr.strip())
-    return float(result.stdout.strip())
+
+    info = json.loads(result.stdout)
+    streams = info.get("streams") or []
+    if not streams:
+        raise RuntimeError("no video stream")
+
+    duration = info.get("format", {}).get("duration") or streams[0].get("duration")
+    if duration in (None, "N/A"):
+        raise RuntimeError("could not determine duration")
+    return float(duration)
 
 
 def compute_timestamps(duration: float, n: int) -> List[float]:
@@ -55,14 +82,33 @@ def compute_timestamps(duration: float, n: int) -> List[float]:
     return [(i + 0.5) * segment for i in range(n)]
 
 
-def extract_frame(video_path: Path, timestamp: float, out_path: Path) -> None:
-    cmd = [
-        "ffmpeg",
-        "-hide_banner",
-        "-loglevel", "error",
-        "-ss", f"{timestamp:.3f}",
-        "-i", str(video_path),
+def frames_command(video_path: Path, timestamps: List[float], tile_height: int, join: str) -> List[str]:
+    # Start of an ffmpeg command that grabs one frame per timestamp and feeds them to the
+    # `join` filter, whose output is mapped. Each timestamp is its own input-seeked copy
+    # of the video (so ffmpeg still jumps to the nearest keyframe rather than decoding the
+    # whole file), cut to one frame and scaled to the tile height. Decoders run
+    # single-threaded: main() already runs one ffmpeg per core-pair.
+    cmd = ["ffmpeg", "-hide_banner", "-loglevel", "error"]
+    for ts in timestamps:
+        cmd += ["-threads", "1", "-ss", f"{ts:.3f}", "-i", str(video_path)]
+
+    n = len(timestamps)
+    chains = [
+        f"[{i}:v]trim=end_frame=1,scale=-2:{tile_height}:flags=lanczos,setsar=1[v{i}]"
+        for i in range(n)
+    ]
+    inputs = "".join(f"[v{i}]" for i in range(n))
+    graph = ";".join(chains + [f"{inputs}{join}[out]"])
+    return cmd + ["-filter_complex", graph, "-map", "[out]", "-threads", "1"]
+
+
+def ffmpeg_collage(video_path: Path, timestamps: List[float], out_path: Path, tile_height: int) -> None:
+    # hstack the tiles inside ffmpeg and write the collage directly
+    n = len(timestamps)
+    join = f"hstack=inputs={n}" if n > 1 else "null"
+    cmd = frames_command(video_path, timestamps, tile_height, join) + [
         "-frames:v", "1",
+        "-update", "1",
         "-q:v", "2",
         str(out_path),
     ]
@@ -71,14 +117,44 @@ def extract_frame(video_path: Path, timestamp: float, out_path: Path) -> None:
         raise RuntimeError(result.stderr.strip())
 
 
-def make_collage(images: List[Path], out_path: Path, tile_height: int) -> None:
-    tiles = []
-    for img_path in images:
-        img = Image.open(img_path).convert("RGB")
-        w, h = img.size
-        new_w = int(w * (tile_height / h))
-        img = img.resize((new_w, tile_height), Image.LANCZOS)
-        tiles.append(img)
+def extract_frames(video_path: Path, timestamps: List[float], tile_height: int) -> List["Image.Image"]:
+    # Every seeked input starts at pts 0, hence the setpts=N renumbering after concat.
+    # The frames come back as a stream of JPEGs on stdout, split on SOI/EOI markers,
+    # so nothing touches the disk.
+    n = len(timestamps)
+    cmd = frames_command(video_path, timestamps, tile_height, f"concat=n={n}:v=1:a=0,setpts=N") + [
+        "-vsync", "0",
+        "-q:v", "2",
+        "-f", "image2pipe",
+        "-vcodec", "mjpeg",
+        "-",
+    ]
+    result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.decode(errors="replace").strip())
+
+    Image = _require("PIL.Image", "pillow")
+    buf = result.stdout
+    frames = []
+    i = 0
+    while True:
+        start = buf.find(b"\xff\xd8", i)
+        end = buf.find(b"\xff\xd9", start) + 2
+        if start < 0 or end < 2:
+            break
+        frames.append(Image.open(io.BytesIO(buf[start:end])))
+        i = end
+
+    if len(frames) != n:
+        raise RuntimeError(f"expected {n} frames from ffmpeg, got {len(frames)}")
+    return frames
+
+
+def make_collage(frames: List["Image.Image"], out_path: Path, tile_height: int) -> None:
+    Image = _require("PIL.Image", "pillow")
+
+    # Frames arrive already scaled to tile_height by ffmpeg
+    tiles = [img.convert("RGB") for img in frames]
 
     total_width = sum(img.width for img in tiles)
     collage = Image.new("RGB", (total_width, tile_height), (0, 0, 0))
@@ -97,19 +173,13 @@ def process_video(video_path: Path, frames: int, tile_height: int, fmt: str) ->
         print(f"Skipping (already exists): {out_path.name}")
         return
 
-    duration = get_duration_seconds(video_path)
-    timestamps = compute_timestamps(duration, frames)
-
-    with tempfile.TemporaryDirectory(prefix="movie_summary_") as tmp:
-        tmpdir = Path(tmp)
-        frame_paths = []
+    timestamps = compute_timestamps(probe_duration(video_path), frames)
 
-        for i, ts in enumerate(timestamps, 1):
-            frame = tmpdir / f"frame_{i:02d}.jpg"
-            extract_frame(video_path, ts, frame)
-            frame_paths.append(frame)
-
-        make_collage(frame_paths, out_path, tile_height)
+    if frames <= MAX_HSTACK_INPUTS:
+        ffmpeg_collage(video_path, timestamps, out_path, tile_height)
+    else:
+        # Very wide collages: skip the hstack filtergraph and assemble the frames in Pillow
+        make_collage(extract_frames(video_path, timestamps, tile_height), out_path, tile_height)
 
     print(f"Created: {out_path}")
 
@@ -131,12 +201,15 @@ def main() -> int:
     parser.add_argument("--format", choices=["jpg", "png"], default="jpg")
     args = parser.parse_args()
 
-    # Verify ffmpeg tools
+    # Verify ffmpeg tools (a PATH lookup, not a process spawn)
     for tool in ("ffmpeg", "ffprobe"):
-        if run_cmd([tool, "-version"]).returncode != 0:
+        if shutil.which(tool) is None:
             print(f"Error: {tool} not found in PATH", file=sys.stderr)
             return 2
 
+    if args.frames > MAX_HSTACK_INPUTS:
+        _require("PIL.Image", "pillow")  # fail now rather than inside every worker
+
     path = Path(args.path).expanduser().resolve()
     if not path.exists():
         print(f"Error: path not found: {path}", file=sys.stderr)
@@ -152,11 +225,18 @@ def main() -> int:
         print("No video files found.")
         return 0
 
-    for video in videos:
-        try:
-            process_video(video, args.frames, args.tile_height, args.format)
-        except Exception as e:
-            print(f"Failed on {video.name}: {e}", file=sys.stderr)
+    # Videos are independent; run them side by side, one single-threaded ffmpeg each
+    workers = min(len(videos), max(1, (os.cpu_count() or 2) // 2))
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as ex:
+        futures = {
+            ex.submit(process_video, video, args.frames, args.tile_height, args.format): video
+            for video in videos
+        }
+        for future in concurrent.futures.as_completed(futures):
+            try:
+                future.result()
+            except Exception as e:
+                print(f"Failed on {futures[future].name}: {e}", file=sys.stderr)
 
     return 0
 
@@ -2,6 +2,19 @@ import tkinter as tk
 from tkinter import filedialog, messagebox
 from PIL import Image, ImageTk, ImageFilter, ImageGrab
 import os
+import threading
+from collections import deque
+
+BLUR_RADIUS = 25
+BLUR_DOWNSCALE = 8  # blur a 1/8-size copy with a proportionally smaller radius, then scale back up
+MAX_UNDO = 32
+
+
+def blur_region(region):
+    w, h = region.size
+    small = region.resize((max(1, w // BLUR_DOWNSCALE), max(1, h // BLUR_DOWNSCALE)), Image.BILINEAR)
+    small = small.filter(ImageFilter.GaussianBlur(BLUR_RADIUS / BLUR_DOWNSCALE))
+    return small.resize((w, h), Image.BILINEAR)
 
 class RedactorApp:
     def __init__(self, root):
@@ -13,7 +26,10 @@ class RedactorApp:
         self.rect = None
         self.redaction_type = "blur"
         self.filename = None
-        self.history = []  # Undo history
+        self.history = deque(maxlen=MAX_UNDO)  # Undo history: (box, original pixels of box)
+        self.pending = []  # (mode, box) redactions waiting for an in-flight blur
+        self.blurring = False
+        self.blur_gen = 0  # bumped to drop the result of an in-flight blur
 
         # Menu bar
         self.menu = tk.Menu(self.root)
@@ -48,8 +64,13 @@ class RedactorApp:
     def load_image(self):
         file_path = filedialog.askopenfilename(filetypes=[("Image files", "*.png;*.jpg;*.jpeg;*.bmp")])
         if file_path:
-            self.image = Image.open(file_path).convert("RGB")
+            img = Image.open(file_path)
+            img.draft("RGB", img.size)  # JPEG: have libjpeg decode straight to RGB; no-op otherwise
+            if img.mode != "RGB":
+                img = img.convert("RGB")
+            self.image = img
             self.filename = os.path.basename(file_path)
+            self.cancel_pending()
             self.history.clear()
             self.display_image()
 
@@ -57,8 +78,9 @@ class RedactorApp:
         try:
             img = ImageGrab.grabclipboard()
             if isinstance(img, Image.Image):
-                self.image = img.convert("RGB")
+                self.image = img if img.mode == "RGB" else img.convert("RGB")
                 self.filename = "clipboard.png"
+                self.cancel_pending()
                 self.history.clear()
                 self.display_image()
             else:
@@ -70,8 +92,20 @@ class RedactorApp:
         self.tk_img = ImageTk.PhotoImage(self.image)
         self.canvas.config(width=self.tk_img.width(), height=self.tk_img.height())
         self.canvas.delete("all")
+        self.rect = None
         self.canvas.create_image(0, 0, anchor="nw", image=self.tk_img)
 
+    def refresh_region(self, box):
+        # Re-upload only the changed rectangle into the displayed photo; the canvas
+        # item already shows self.tk_img, so it picks the change up by itself
+        w, h = self.image.size
+        x1, y1 = max(0, box[0]), max(0, box[1])
+        x2, y2 = min(w, box[2]), min(h, box[3])
+        if x1 >= x2 or y1 >= y2:
+            return
+        patch = ImageTk.PhotoImage(self.image.crop((x1, y1, x2, y2)))
+        self.root.tk.call(str(self.tk_img), "copy", str(patch), "-to", x1, y1)
+
     def set_redaction(self, mode):
         self.redaction_type = mode
 
@@ -88,26 +122,72 @@ class RedactorApp:
         if not self.image:
             return
 
-        # Save current image to history
-        self.history.append(self.image.copy())
-        self.update_undo_state()
-
         x1, y1 = min(self.start_x, event.x), min(self.start_y, event.y)
         x2, y2 = max(self.start_x, event.x), max(self.start_y, event.y)
         box = (x1, y1, x2, y2)
 
-        if self.redaction_type == "blur":
-            region = self.image.crop(box).filter(ImageFilter.GaussianBlur(25))
-        else:
-            region = Image.new("RGB", (x2 - x1, y2 - y1), (0, 0, 0))
+        if self.rect:
+            self.canvas.delete(self.rect)
+            self.rect = None
 
-        self.image.paste(region, box)
-        self.display_image()
+        if x2 <= x1 or y2 <= y1:
+            return  # a click or a flat drag covers no pixels
+
+        # Redactions apply in order; while a blur is running, later ones wait their turn
+        self.pending.append((self.redaction_type, box))
+        if not self.blurring:
+            self.run_pending()
+
+    def run_pending(self):
+        while self.pending:
+            mode, box = self.pending.pop(0)
+
+            # Save the pixels about to be covered, not the whole image
+            region = self.image.crop(box)
+            self.history.append((box, region))
+            self.update_undo_state()
+
+            if mode == "blur":
+                # Blur on a worker thread so the UI stays responsive; blur_done resumes the queue
+                self.blurring = True
+                args = (region, box, self.blur_gen)
+                threading.Thread(target=self.blur_worker, args=args, daemon=True).start()
+                break
+
+            x1, y1, x2, y2 = box
+            self.image.paste(Image.new("RGB", (x2 - x1, y2 - y1), (0, 0, 0)), box)
+            self.refresh_region(box)
+
+    def blur_worker(self, region, box, gen):
+        blurred = None
+        try:
+            blurred = blur_region(region)
+        finally:
+            # Always hand back, even on failure, so the queue is never left waiting
+            self.root.after(0, self.blur_done, blurred, box, gen)
+
+    def blur_done(self, blurred, box, gen):
+        if gen != self.blur_gen:
+            return  # undone or replaced by a new image while it was running
+        self.blurring = False
+        if blurred is not None:
+            self.image.paste(blurred, box)
+            self.refresh_region(box)
+        self.run_pending()
+
+    def cancel_pending(self):
+        self.pending.clear()
+        self.blurring = False
+        self.blur_gen += 1
 
     def undo_redaction(self):
+        # Undo also drops a blur still in flight (its history entry is already pushed)
+        # and anything queued behind it
+        self.cancel_pending()
         if self.history:
-            self.image = self.history.pop()
-            self.display_image()
+            box, region = self.history.pop()
+            self.image.paste(region, box)
+            self.refresh_region(box)
             self.update_undo_state()
         else:
             messagebox.showinfo("Undo", "Nothing to undo.")
@@ -122,6 +202,9 @@ class RedactorApp:
         if not self.image:
             messagebox.showerror("Error", "No image to save.")
             return
+        if self.blurring:
+            messagebox.showinfo("Busy", "A blur is still being applied; try again in a moment.")
+            return
 
         save_path = filedialog.asksaveasfilename(
             defaultextension=".png",
@@ -1,3 +1,5 @@
+import importlib
+import re
 import time
 import datetime as dt
 import threading
@@ -5,9 +7,6 @@ import queue
 import tkinter as tk
 from tkinter import ttk, messagebox
 
-import serial
-import requests
-
 CONFIG = {
     "serial_port": "COM3",
     "baudrate": 115200,
@@ -28,6 +27,47 @@ CONFIG = {
 }
 
 
+# A whole field that is a plain decimal number, optionally with an exponent
+NUM_RE = re.compile(rb"[-+]?(?:\d+(?:\.\d*)?|\.\d+)(?:[eE][-+]?\d+)?")
+
+
+def _require(name: str, pip_name: str):
+    """
+    Import on first use: pyserial and requests (urllib3, certifi, ...) are only needed
+    once logging starts, so the window comes up without paying for them.
+    """
+    try:
+        return importlib.import_module(name)
+    except ImportError:
+        raise RuntimeError(f"{name} required: pip install {pip_name}") from None
+
+
+def make_session():
+    """
+    One keep-alive session for all posts, so each minute's post reuses the TCP/TLS
+    connection instead of handshaking again. urllib3 does not retry POSTs on a status
+    or read error by default, so only failed connects are retried (no duplicate rows).
+    """
+    requests = _require("requests", "requests")
+    from requests.adapters import HTTPAdapter
+    from urllib3.util import Retry
+
+    session = requests.Session()
+    retry = Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504])
+    session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=2, max_retries=retry))
+    return session
+
+
+_session = None
+
+
+def get_session():
+    global _session
+    if _session is None:
+        _session = make_session()
+    return _session
+
+
 def utc_iso():
     return dt.datetime.now(dt.timezone.utc).isoformat(timespec="seconds")
 
@@ -36,73 +76,59 @@ def c_to_f(c: float) -> float:
     return (c * 9.0 / 5.0) + 32.0
 
 
-def parse_temp(line: str):
+def sane_temp(field: bytes):
+    """field as a temperature within the configured range, else None."""
+    if not NUM_RE.fullmatch(field):
+        return None
+    candidate = float(field)
+    if CONFIG["temp_min_c"] <= candidate <= CONFIG["temp_max_c"]:
+        return candidate
+    return None
+
+
+def parse_temp(line: bytes):
     """
     Expected formats:
       1) "4023340879, 31.08, 14.75, 184"  -> temp is field 2 (index 1)
       2) "23.56"
       3) "timestamp,23.56"
       4) "temp=23.56"
-    Returns: (temp_c or None, raw_line)
+    Takes the raw serial bytes; each candidate field is checked with NUM_RE instead
+    of a float() attempt inside try/except.
+    Returns: (temp_c or None, raw_line as stripped bytes; decode only for display)
     """
     raw = line.strip()
     if not raw:
         return None, raw
 
-    tmin = CONFIG["temp_min_c"]
-    tmax = CONFIG["temp_max_c"]
-
-    if "," in raw:
-        parts = [p.strip() for p in raw.split(",")]
-
-        # Your observed format: 4 columns, temp is column 2
-        if len(parts) >= 2:
-            try:
-                candidate = float(parts[1])
-                if tmin <= candidate <= tmax:
-                    return candidate, raw
-            except ValueError:
-                pass
+    if b"," in raw:
+        parts = [p.strip() for p in raw.split(b",")]
 
+        # Your observed format: 4 columns, temp is column 2.
         # Fallback: try any field that looks like a sane temperature
-        for p in parts:
-            try:
-                candidate = float(p)
-                if tmin <= candidate <= tmax:
-                    return candidate, raw
-            except ValueError:
-                continue
+        for p in parts[1:2] + parts:
+            candidate = sane_temp(p)
+            if candidate is not None:
+                return candidate, raw
 
         return None, raw
 
-    if "=" in raw:
-        candidate = raw.split("=")[-1].strip()
-        try:
-            candidate_f = float(candidate)
-            if tmin <= candidate_f <= tmax:
-                return candidate_f, raw
-        except ValueError:
-            return None, raw
+    if b"=" in raw:
+        return sane_temp(raw.rsplit(b"=", 1)[1].strip()), raw
 
-    try:
-        candidate = float(raw)
-        if tmin <= candidate <= tmax:
-            return candidate, raw
-        return None, raw
-    except ValueError:
-        return None, raw
+    return sane_temp(raw), raw
 
 
-def post_row(temp_c, raw_line):
+def post_row(temp_c, raw_line, timestamp=None):
     payload = {
         "secret": CONFIG["secret"],
-        "timestamp_utc": utc_iso(),
+        "timestamp_utc": timestamp or utc_iso(),
         "temp_c": round(temp_c, 2) if temp_c is not None else "",
         "temp_f": round(c_to_f(temp_c), 2) if temp_c is not None else "",
         "raw": raw_line,
         "sensor_name": CONFIG["sensor_name"],
     }
-    r = requests.post(CONFIG["web_app_url"], json=payload, timeout=10)
+    r = get_session().post(CONFIG["web_app_url"], json=payload, timeout=10)
     r.raise_for_status()
     return r.text
 
@@ -116,19 +142,51 @@ def seconds_until_next_minute():
 class LoggerWorker(threading.Thread):
     """
     Background logger thread. Communicates back to the UI via a queue of events.
+    Posting happens on a second thread fed by _post_q, so a slow or failing POST
+    never delays the next serial read.
     """
-    def __init__(self, ui_queue: queue.Queue, stop_event: threading.Event):
+    def __init__(self, ui_queue: queue.Queue, stop_event: threading.Event, tk_root: tk.Misc):
         super().__init__(daemon=True)
         self.ui_queue = ui_queue
         self.stop_event = stop_event
+        self._tk_root = tk_root
+        self._post_q = queue.Queue(maxsize=256)
 
     def emit(self, event_type: str, message: str = "", **data):
         payload = {"type": event_type, "message": message, **data}
         self.ui_queue.put(payload)
+        # Wake the UI to drain the queue (Tk marshals this onto its own thread)
+        try:
+            self._tk_root.event_generate("<<LoggerEvent>>", when="tail")
+        except (RuntimeError, tk.TclError):
+            pass  # window closed / mainloop gone
+
+    def _post_loop(self):
+        while not self.stop_event.is_set():
+            try:
+                item = self._post_q.get(timeout=0.5)
+            except queue.Empty:
+                continue
+
+            # Post to Sheets
+            try:
+                resp = post_row(item["temp_c"], item["raw"], item["timestamp"])
+                self.emit("posted", f"Posted OK: {resp}", timestamp=utc_iso())
+            except Exception as e:
+                self.emit("error", f"Post failed: {e}", timestamp=utc_iso())
 
     def run(self):
         self.emit("status", "Starting logger…")
 
+        try:
+            serial = _require("serial", "pyserial")
+        except RuntimeError as e:
+            self.emit("error", str(e))
+            self.emit("status", "Logger stopped.")
+            return
+
+        threading.Thread(target=self._post_loop, daemon=True).start()
+
         try:
             with serial.Serial(
                 CONFIG["serial_port"],
@@ -156,26 +214,29 @@ class LoggerWorker(threading.Thread):
 
                     # Read temperature
                     temp_c = None
-                    raw_line = ""
+                    raw = b""
                     for _ in range(10):
                         if self.stop_event.is_set():
                             break
-                        line = ser.readline().decode("utf-8", errors="replace").strip()
+                        line = ser.readline()
+                        if not line:
+                            continue  # read timed out
                         tc, raw = parse_temp(line)
-                        raw_line = raw
                         if tc is not None:
                             temp_c = tc
                             break
+                    raw_line = raw.decode("utf-8", errors="replace")
 
                     if self.stop_event.is_set():
                         break
 
                     # Update UI with last reading
+                    timestamp = utc_iso()
                     if temp_c is not None:
                         self.emit(
                             "reading",
                             "",
-                            timestamp=utc_iso(),
+                            timestamp=timestamp,
                             temp_c=temp_c,
                             temp_f=c_to_f(temp_c),
                             raw=raw_line
@@ -184,18 +245,17 @@ class LoggerWorker(threading.Thread):
                         self.emit(
                             "reading",
                             "No valid temperature reading this cycle",
-                            timestamp=utc_iso(),
+                            timestamp=timestamp,
                             temp_c=None,
                             temp_f=None,
                             raw=raw_line
                         )
 
-                    # Post to Sheets
+                    # Hand off to the posting thread
                     try:
-                        resp = post_row(temp_c, raw_line)
-                        self.emit("posted", f"Posted OK: {resp}", timestamp=utc_iso())
-                    except Exception as e:
-                        self.emit("error", f"Post failed: {e}", timestamp=utc_iso())
+                        self._post_q.put_nowait({"temp_c": temp_c, "raw": raw_line, "timestamp": timestamp})
+                    except queue.Full:
+                        self.emit("error", "Post queue full; reading dropped", timestamp=utc_iso())
 
         except Exception as e:
             self.emit("error", f"Serial open failed: {e}")
@@ -227,7 +287,7 @@ class App(tk.Tk):
         self.worker = None
 
         self._build_ui()
-        self._poll_queue()
+        self.bind("<<LoggerEvent>>", lambda e: self._drain_queue())
 
     def _build_ui(self):
         pad = {"padx": 10, "pady": 6}
@@ -301,7 +361,7 @@ class App(tk.Tk):
             return
 
         self.stop_event.clear()
-        self.worker = LoggerWorker(self.ui_queue, self.stop_event)
+        self.worker = LoggerWorker(self.ui_queue, self.stop_event, self)
         self.worker.start()
 
         self.status_var.set("Running…")
@@ -319,14 +379,13 @@ class App(tk.Tk):
         # But in case it’s stuck, we’ll re-enable after a short delay.
         self.after(1500, lambda: self.start_btn.configure(state="normal"))
 
-    def _poll_queue(self):
+    def _drain_queue(self):
         try:
             while True:
                 evt = self.ui_queue.get_nowait()
                 self._handle_event(evt)
         except queue.Empty:
             pass
-        self.after(200, self._poll_queue)
 
     def _handle_event(self, evt: dict):
         et = evt.get("type")
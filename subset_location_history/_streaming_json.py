@@ -0,0 +1,124 @@
+"""
+_streaming_json.py
+
+Streaming readers for the huge JSON arrays in Google Location History exports,
+shared by subset_location_history.py and subset_by_state.py. They yield each
+record's JSON text without parsing it; the scripts' workers do the parsing.
+"""
+
+from __future__ import annotations
+
+import re
+from itertools import chain
+from typing import Iterable, Iterator
+
+# Skips everything up to the next brace or ']' (whole strings, escapes included) and
+# captures that character; None at the end of the text. A '"' is only captured where
+# the string's closing quote is not in the text yet.
+JSON_TOKEN_RE = re.compile(r'[^"{}\]]*(?:"[^"\\]*(?:\\.[^"\\]*)*"[^"{}\]]*)*(?:([{}\]"])|\Z)')
+
+
+def read_blocks(fp, bufsize: int = 1 << 20) -> Iterator[str]:
+    """Yield fp in 1 MiB blocks."""
+    while True:
+        block = fp.read(bufsize)
+        if not block:
+            return
+        yield block
+
+
+def iter_array_objects(blocks: Iterable[str]) -> Iterator[str]:
+    """
+    Stream the JSON text of each object in an array, from text blocks starting just
+    past its '['. Pragmatic scanner: JSON_TOKEN_RE jumps from brace to brace in C
+    (strings and everything else in between are one match), so Python only sees the
+    braces. Parsing is left to the caller.
+
+    An object (or string) cut off by the end of a block is carried over and
+    rescanned together with the next block. Non-object elements are skipped.
+    """
+    carry = ""
+    for block in blocks:
+        text = carry + block if carry else block
+        carry = ""
+        depth = 0
+        start = 0
+
+        for m in JSON_TOKEN_RE.finditer(text):
+            tok = m.group(1)
+            if tok == "{":
+                if not depth:
+                    start = m.start(1)
+                depth += 1
+            elif tok == "}":
+                if depth:
+                    depth -= 1
+                    if not depth:
+                        yield text[start:m.end()]
+            elif tok == "]":
+                if not depth:
+                    return
+            elif tok == '"':
+                # String runs past the end of this block
+                carry = text[start if depth else m.start(1):]
+                break
+            # None: reached the end of the block
+        else:
+            if depth:
+                carry = text[start:]
+
+    if carry.startswith("{"):
+        raise RuntimeError("Unexpected EOF while reading an object.")
+
+
+def iter_top_level_array(fp) -> Iterator[str]:
+    """
+    Stream a top-level JSON array without loading it all.
+    Assumes array elements are JSON objects.
+    """
+    blocks = read_blocks(fp)
+    # Skip to '['
+    head = ""
+    for block in blocks:
+        head = block.lstrip()
+        if head:
+            break
+    if not head.startswith("["):
+        raise RuntimeError("Not a top-level JSON array (missing '[').")
+
+    yield from iter_array_objects(chain([head[1:]], blocks))
+
+
+def iter_keyed_array(fp, key: str) -> Iterator[str]:
+    """
+    Stream objects from a JSON array stored under a top-level key.
+
+    This is a pragmatic scanner: it finds the substring '"<key>"' then the next '['
+    and then streams objects in that array like iter_top_level_array does, but starting
+    from that point.
+
+    Works for large files without loading all content.
+    """
+    needle = f'"{key}"'
+    blocks = read_blocks(fp)
+    tail = ""
+    # Scan for the key, block by block; the tail of the previous block is kept
+    # so a key split across two blocks is still found
+    for block in blocks:
+        text = tail + block
+        i = text.find(needle)
+        if i >= 0:
+            break
+        tail = text[-len(needle):]
+    else:
+        raise RuntimeError(f"Could not find key {needle} in file.")
+
+    # Now scan forward to the first '[' after the key
+    rest = text[i + len(needle):]
+    while (j := rest.find("[")) < 0:
+        rest = next(blocks, None)
+        if rest is None:
+            raise RuntimeError(f"Found key {needle} but did not find '[' starting its array.")
+
+    # Now stream objects from this array
+    yield from iter_array_objects(chain([rest[j + 1:]], blocks))
@@ -11,9 +11,12 @@ Subset Google Location History JSON records to a single US state.
     * (also scans a few other likely geo: fields)
 - Includes a record if ANY point in the record falls within the chosen state.
 - Streams a top-level JSON array or a keyed array via --records-key, without loading entire file.
+- Parses and tests records in worker processes (one per CPU, less one for the reader).
 
 Dependencies:
-    pip install geopandas shapely pyproj requests
+    pip install geopandas "shapely>=2" pyproj requests
+    pip install numba   (optional: compiles the bounding-box filter)
+    pip install orjson  (optional: faster per-record JSON parsing)
 
 Example:
     python3 subset_by_state.py LocationHistory_2021.json Mississippi --out MS_2021.json
@@ -23,190 +26,70 @@ from __future__ import annotations
 
 import argparse
 import json
+import os
 import re
+import shutil
 import sys
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
 from dataclasses import dataclass
 from datetime import datetime
+from itertools import islice
 from pathlib import Path
-from typing import Any, Dict, Iterator, List, Optional, Tuple
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from _streaming_json import iter_keyed_array, iter_top_level_array
 
 # --- optional external deps ---
 try:
+    import numpy as np
     import requests
     import geopandas as gpd
-    from shapely.geometry import Point
+    import shapely
 except Exception as e:
     print(
         "Missing dependencies. Install with:\n"
-        "  pip install geopandas shapely pyproj requests\n",
+        "  pip install geopandas \"shapely>=2\" pyproj requests\n",
         file=sys.stderr,
     )
     raise
 
+try:
+    from numba import njit
+except ImportError:  # optional: compiles bbox_mask below
+    njit = None
+
+try:
+    import orjson
+except ImportError:  # optional: records are parsed with the json module instead
+    orjson = None
+
+json_loads = orjson.loads if orjson is not None else json.loads
+
+
 GEO_RE = re.compile(r"^geo:\s*([-+]?\d+(?:\.\d+)?)\s*,\s*([-+]?\d+(?:\.\d+)?)\s*$", re.IGNORECASE)
 
+# One coordinate as GEO_RE accepts it; float() alone would also take 1e3, 1_0, nan and inf
+COORD_RE = re.compile(r"\s*[-+]?\d+(?:\.\d+)?\s*")
+
+# A "geo:" string in a record's raw JSON text, from just past "geo:" to its closing quote
+GEO_TEXT_RE = re.compile(r'geo:([^"]*)"', re.IGNORECASE)
+
 # Census GeoJSON for US states (cartographic boundary file).
 # This is a stable, widely-used endpoint; if it ever changes, swap URL.
 CENSUS_STATES_GEOJSON = (
     "https://www2.census.gov/geo/tiger/GENZ2023/shp/cb_2023_us_state_20m.zip"
 )
 
+# Records per worker task; each task's points are tested in one vectorized call
+CHUNK_SIZE = 1000
+
 # -----------------------------
 # Streaming JSON readers
 # -----------------------------
 
-def iter_top_level_array(fp) -> Iterator[Dict[str, Any]]:
-    """Stream objects from a top-level JSON array: [ {...}, {...} ]"""
-    ch = fp.read(1)
-    while ch and ch.isspace():
-        ch = fp.read(1)
-    if ch != "[":
-        raise RuntimeError("Not a top-level JSON array (missing '[').")
-
-    buf: List[str] = []
-    depth = 0
-    in_str = False
-    esc = False
-
-    while True:
-        ch = fp.read(1)
-        if not ch:
-            break
-
-        if in_str:
-            buf.append(ch)
-            if esc:
-                esc = False
-            elif ch == "\\":
-                esc = True
-            elif ch == '"':
-                in_str = False
-            continue
-
-        if ch.isspace() or ch == ",":
-            continue
-
-        if ch == "{":
-            buf = ["{"]
-            depth = 1
-            in_str = False
-            esc = False
-
-            while depth > 0:
-                ch = fp.read(1)
-                if not ch:
-                    raise RuntimeError("Unexpected EOF while reading an object.")
-                buf.append(ch)
-
-                if in_str:
-                    if esc:
-                        esc = False
-                    elif ch == "\\":
-                        esc = True
-                    elif ch == '"':
-                        in_str = False
-                    continue
-
-                if ch == '"':
-                    in_str = True
-                elif ch == "{":
-                    depth += 1
-                elif ch == "}":
-                    depth -= 1
-
-            obj = json.loads("".join(buf))
-            if isinstance(obj, dict):
-                yield obj
-            continue
-
-        if ch == "]":
-            break
-
-
-def iter_keyed_array(fp, key: str) -> Iterator[Dict[str, Any]]:
-    """
-    Stream objects from a JSON array stored under a top-level key:
-      { "<key>": [ {...}, {...} ] }
-    """
-    needle = f'"{key}"'
-    window = ""
-    while True:
-        ch = fp.read(1)
-        if not ch:
-            raise RuntimeError(f"Could not find key {needle} in file.")
-        window = (window + ch)[-max(2048, len(needle) + 20):]
-        if needle in window:
-            break
-
-    # find the '[' starting the array
-    ch = fp.read(1)
-    while ch and ch != "[":
-        ch = fp.read(1)
-    if ch != "[":
-        raise RuntimeError(f"Found key {needle} but did not find '[' starting its array.")
-
-    # Now stream objects inside that array
-    buf: List[str] = []
-    depth = 0
-    in_str = False
-    esc = False
-
-    while True:
-        ch = fp.read(1)
-        if not ch:
-            break
-
-        if in_str:
-            buf.append(ch)
-            if esc:
-                esc = False
-            elif ch == "\\":
-                esc = True
-            elif ch == '"':
-                in_str = False
-            continue
-
-        if ch.isspace() or ch == ",":
-            continue
-
-        if ch == "{":
-            buf = ["{"]
-            depth = 1
-            in_str = False
-            esc = False
-
-            while depth > 0:
-                ch = fp.read(1)
-                if not ch:
-                    raise RuntimeError("Unexpected EOF while reading an object.")
-                buf.append(ch)
-
-                if in_str:
-                    if esc:
-                        esc = False
-                    elif ch == "\\":
-                        esc = True
-                    elif ch == '"':
-                        in_str = False
-                    continue
-
-                if ch == '"':
-                    in_str = True
-                elif ch == "{":
-                    depth += 1
-                elif ch == "}":
-                    depth -= 1
-
-            obj = json.loads("".join(buf))
-            if isinstance(obj, dict):
-                yield obj
-            continue
-
-        if ch == "]":
-            break
-
-
-def iter_records(path: str, records_key: Optional[str]) -> Iterator[Dict[str, Any]]:
+def iter_records(path: str, records_key: Optional[str]) -> Iterator[str]:
+    """Yield the JSON text of each record; parsing happens in the workers."""
     with open(path, "r", encoding="utf-8") as fp:
         # Peek first non-space char
         pos = fp.tell()
@@ -226,6 +109,26 @@ def iter_records(path: str, records_key: Optional[str]) -> Iterator[Dict[str, An
             yield from iter_top_level_array(fp)
 
 
+def chunked(items: Iterable[str], size: int) -> Iterator[List[str]]:
+    it = iter(items)
+    while chunk := list(islice(it, size)):
+        yield chunk
+
+
+def map_in_order(ex: Executor, fn, items: Iterable[Any], ahead: int) -> Iterator[Any]:
+    """
+    Like ex.map(fn, items), but keeps at most `ahead` tasks in flight so a huge
+    input is never read far ahead of the workers. Results come back in input order.
+    """
+    pending: deque = deque()
+    for item in items:
+        pending.append(ex.submit(fn, item))
+        if len(pending) >= ahead:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
 # -----------------------------
 # Geo extraction
 # -----------------------------
@@ -234,6 +137,11 @@ def parse_geo(s: Any) -> Optional[Tuple[float, float]]:
     """Parse 'geo:lat,lon' -> (lat, lon)"""
     if not isinstance(s, str):
         return None
+    if s.startswith("geo:"):
+        # Fast path for the plain "geo:lat,lon" Google writes; anything else goes to GEO_RE
+        lat_s, _, lon_s = s[4:].partition(",")
+        if COORD_RE.fullmatch(lat_s) and COORD_RE.fullmatch(lon_s):
+            return float(lat_s), float(lon_s)
     m = GEO_RE.match(s.strip())
     if not m:
         return None
@@ -242,51 +150,48 @@ def parse_geo(s: Any) -> Optional[Tuple[float, float]]:
     return lat, lon
 
 
-def extract_points(obj: Dict[str, Any]) -> List[Tuple[float, float]]:
+def extract_points(obj: Dict[str, Any]) -> Tuple[List[float], List[float]]:
     """
-    Extract (lat, lon) points from common Google Location History record patterns.
-    Returns list of points (lat, lon).
+    Extract points from common Google Location History record patterns.
+    Returns parallel lists (lats, lons), ready to be stacked into arrays.
     """
-    pts: List[Tuple[float, float]] = []
+    found: List[Any] = []  # candidate "geo:lat,lon" strings
 
     # visit.topCandidate.placeLocation
     visit = obj.get("visit")
     if isinstance(visit, dict):
         tc = visit.get("topCandidate")
         if isinstance(tc, dict):
-            pl = parse_geo(tc.get("placeLocation"))
-            if pl:
-                pts.append(pl)
+            found.append(tc.get("placeLocation"))
 
     # activity.start/end
     activity = obj.get("activity")
     if isinstance(activity, dict):
-        s = parse_geo(activity.get("start"))
-        e = parse_geo(activity.get("end"))
-        if s:
-            pts.append(s)
-        if e:
-            pts.append(e)
+        found.append(activity.get("start"))
+        found.append(activity.get("end"))
 
     # timelinePath[].point
     tpath = obj.get("timelinePath")
     if isinstance(tpath, list):
         for step in tpath:
             if isinstance(step, dict):
-                p = parse_geo(step.get("point"))
-                if p:
-                    pts.append(p)
+                found.append(step.get("point"))
 
     # (Optional) scan a few other likely fields
     # Sometimes coordinates appear in nested candidates or other keys.
     # We do a shallow scan for "geo:" strings.
     for k, v in obj.items():
-        if isinstance(v, str) and v.lower().startswith("geo:"):
-            p = parse_geo(v)
-            if p:
-                pts.append(p)
+        if isinstance(v, str) and v[:4].lower() == "geo:":
+            found.append(v)
 
-    return pts
+    lats: List[float] = []
+    lons: List[float] = []
+    for s in found:
+        pt = parse_geo(s)
+        if pt:
+            lats.append(pt[0])
+            lons.append(pt[1])
+    return lats, lons
 
 
 # -----------------------------
@@ -300,23 +205,47 @@ class StateGeom:
     geom  : Any  # shapely geometry
 
 
-def load_states_geoms(cache_dir: str) -> gpd.GeoDataFrame:
+def download_states_zip(zip_path: Path) -> None:
     """
-    Download (if needed) and load Census cartographic boundary states.
+    Fetch the Census zip into zip_path. If a copy is already there, its saved ETag
+    makes this a conditional GET that downloads nothing when the file is unchanged.
+    """
+    etag_path = zip_path.with_name(zip_path.name + ".etag")
+    headers = {}
+    if zip_path.exists() and etag_path.exists():
+        headers["If-None-Match"] = etag_path.read_text().strip()
+
+    with requests.get(CENSUS_STATES_GEOJSON, stream=True, timeout=60, headers=headers) as r:
+        if r.status_code == 304:
+            print(f"State boundaries unchanged: {zip_path}", file=sys.stderr)
+            return
+        r.raise_for_status()
+        print(f"Downloading state boundaries to {zip_path} ...", file=sys.stderr)
+        # Stream into a side file so an interrupted download never looks like a cached zip
+        part_path = zip_path.with_name(zip_path.name + ".part")
+        r.raw.decode_content = True
+        with open(part_path, "wb") as f:
+            shutil.copyfileobj(r.raw, f, length=1 << 20)
+        part_path.replace(zip_path)
+
+        etag = r.headers.get("ETag")
+        if etag:
+            etag_path.write_text(etag)
+        elif etag_path.exists():
+            etag_path.unlink()
+
+
+def load_states_geoms(cache_dir: str, refresh: bool = False) -> gpd.GeoDataFrame:
+    """
+    Download (if needed, or re-check if refresh) and load Census cartographic boundary states.
     Returns GeoDataFrame with geometry in EPSG:4326.
     """
     cache = Path(cache_dir)
     cache.mkdir(parents=True, exist_ok=True)
 
     zip_path = cache / "cb_us_state_20m.zip"
-    if not zip_path.exists():
-        print(f"Downloading state boundaries to {zip_path} ...", file=sys.stderr)
-        r = requests.get(CENSUS_STATES_GEOJSON, stream=True, timeout=60)
-        r.raise_for_status()
-        with open(zip_path, "wb") as f:
-            for chunk in r.iter_content(chunk_size=1024 * 1024):
-                if chunk:
-                    f.write(chunk)
+    if refresh or not zip_path.exists():
+        download_states_zip(zip_path)
 
     # geopandas can read directly from zip
     gdf = gpd.read_file(f"zip://{zip_path}")
@@ -335,37 +264,114 @@ def select_state_geom(states_gdf: gpd.GeoDataFrame, state_query: str) -> StateGe
     if "NAME" not in states_gdf.columns or "STUSPS" not in states_gdf.columns:
         raise RuntimeError("Unexpected Census file schema: missing NAME/STUSPS columns.")
 
+    # One pass over the ~50 rows builds both lookups; the first row wins, as iloc[0] did
+    rows = list(zip(states_gdf["NAME"], states_gdf["STUSPS"], states_gdf["geometry"]))
+    index: Dict[str, Tuple[str, str, Any]] = {}
+    for row in rows:
+        for key in row[:2]:
+            if isinstance(key, str):
+                index.setdefault(key.lower(), row)
+
     # match by name or USPS code
-    hit = states_gdf[
-        (states_gdf["NAME"].str.lower() == q) | (states_gdf["STUSPS"].str.lower() == q)
-    ]
-    if hit.empty:
+    row = index.get(q)
+    if row is None:
         # allow partial name match
-        hit = states_gdf[states_gdf["NAME"].str.lower().str.contains(q, na=False)]
-    if hit.empty:
+        row = next((r for r in rows if isinstance(r[0], str) and q in r[0].lower()), None)
+    if row is None:
         raise RuntimeError(f"State not found for query: {state_query!r}")
 
-    row = hit.iloc[0]
-    return StateGeom(name=row["NAME"], stusps=row["STUSPS"], geom=row["geometry"])
+    name, stusps, geom = row
+    return StateGeom(name=name, stusps=stusps, geom=geom)
 
 
 # -----------------------------
-# Main
+# Point-in-state tests
 # -----------------------------
 
-def record_in_state(obj: Dict[str, Any], state_geom: Any) -> bool:
-    pts = extract_points(obj)
-    if not pts:
-        return False
+def bbox_mask(x: np.ndarray, y: np.ndarray, minx: float, miny: float, maxx: float, maxy: float) -> np.ndarray:
+    """Which points (x=lon, y=lat) fall inside the bounding box."""
+    return (x >= minx) & (x <= maxx) & (y >= miny) & (y <= maxy)
+
+
+if njit is not None:
+    # One fused, multi-threaded pass instead of four temporary arrays
+    bbox_mask = njit(parallel=True, cache=True)(bbox_mask)
+
 
-    # Point-in-polygon: include record if ANY point is inside
-    for lat, lon in pts:
-        p = Point(lon, lat)  # shapely uses (x,y) = (lon,lat)
-        if state_geom.contains(p):
+def may_be_in_bbox(raw: str, minx: float, miny: float, maxx: float, maxy: float) -> bool:
+    """
+    Cheap test on a record's raw text before parsing it. Every point extract_points()
+    finds is a "geo:" string, so a record with none inside the bounding box cannot be
+    in the state. Text with escapes is left to the real parser.
+    """
+    if "\\" in raw:
+        return True
+    for rest in GEO_TEXT_RE.findall(raw):
+        pt = parse_geo("geo:" + rest)
+        if pt and miny <= pt[0] <= maxy and minx <= pt[1] <= maxx:
             return True
     return False
 
 
+def records_in_state(objs: List[Dict[str, Any]], state_geom: Any) -> np.ndarray:
+    """
+    For each record, whether ANY of its points falls inside state_geom.
+    All points of the batch are tested together: a bounding-box filter, then
+    one shapely.contains_xy call on what is left.
+    """
+    xs: List[float] = []  # shapely uses (x,y) = (lon,lat)
+    ys: List[float] = []
+    counts: List[int] = []  # points per record, in order
+    for obj in objs:
+        lats, lons = extract_points(obj)
+        ys += lats
+        xs += lons
+        counts.append(len(lats))
+
+    hits = np.zeros(len(objs), dtype=bool)
+    if xs:
+        x = np.asarray(xs)
+        y = np.asarray(ys)
+        # Four compares rule out most points; only those in the bounding box get the polygon test
+        near = bbox_mask(x, y, *state_geom.bounds)
+        ids = np.repeat(np.arange(len(objs)), counts)[near]
+        inside = shapely.contains_xy(state_geom, x[near], y[near])
+        hits[ids[inside]] = True
+    return hits
+
+
+_state_geom: Any = None  # set in each worker by init_worker
+_state_bounds: Tuple[float, float, float, float] = (0.0, 0.0, 0.0, 0.0)
+
+
+def init_worker(state_geom: Any) -> None:
+    global _state_geom, _state_bounds
+    _state_geom = state_geom
+    _state_bounds = state_geom.bounds
+    # Build the polygon's edge index once per worker; contains_xy would otherwise redo it every chunk
+    shapely.prepare(_state_geom)
+
+
+def classify_chunk(raws: List[str]) -> List[Optional[bytes]]:
+    """
+    Worker task: parse a chunk of records and test them against the state.
+    Returns, per record, its UTF-8 JSON text if it is in the state, else None. Kept
+    records are written exactly as they appear in the input, not re-serialized.
+    """
+    out: List[Optional[bytes]] = [None] * len(raws)
+    # Only records with a point in the state's bounding box are worth parsing
+    near = [i for i, raw in enumerate(raws) if may_be_in_bbox(raw, *_state_bounds)]
+    objs = [json_loads(raws[i]) for i in near]
+    for i, hit in zip(near, records_in_state(objs, _state_geom)):
+        if hit:
+            out[i] = raws[i].encode("utf-8")
+    return out
+
+
+# -----------------------------
+# Main
+# -----------------------------
+
 def main() -> int:
     ap = argparse.ArgumentParser(description="Subset Google Location History JSON to a US state.")
     ap.add_argument("input", help="Input JSON path (top-level array or use --records-key)")
@@ -373,10 +379,12 @@ def main() -> int:
     ap.add_argument("--out", default=None, help="Output JSON path (default: <input>_<STATE>.json)")
     ap.add_argument("--records-key", default=None, help="If records live under a key, e.g. 'records'")
     ap.add_argument("--cache-dir", default=".cache_state_shapes", help="Where to cache Census boundary zip")
+    ap.add_argument("--refresh-shapes", action="store_true",
+                    help="Re-check the cached Census zip (only re-downloads it if it changed)")
     ap.add_argument("--limit", type=int, default=None, help="Optional max records to export")
     args = ap.parse_args()
 
-    states = load_states_geoms(args.cache_dir)
+    states = load_states_geoms(args.cache_dir, refresh=args.refresh_shapes)
     st = select_state_geom(states, args.state)
     out_path = args.out or f"{Path(args.input).stem}_{st.stusps}.json"
 
@@ -387,25 +395,32 @@ def main() -> int:
     print(f"Reading: {args.input}", file=sys.stderr)
     print(f"Writing: {out_path}", file=sys.stderr)
 
-    with open(out_path, "w", encoding="utf-8") as out:
-        out.write("[\n")
+    # The reader (this process) streams raw records to the workers in order
+    workers = max(1, (os.cpu_count() or 2) - 1)
+    chunks = chunked(iter_records(args.input, args.records_key), CHUNK_SIZE)
+
+    # Binary with a 1 MiB buffer: records arrive as UTF-8 bytes, and small writes coalesce
+    with open(out_path, "wb", buffering=1 << 20) as out, \
+            ProcessPoolExecutor(workers, initializer=init_worker, initargs=(st.geom,)) as ex:
+        out.write(b"[\n")
         first = True
 
-        for obj in iter_records(args.input, args.records_key):
-            total += 1
-            if record_in_state(obj, st.geom):
-                if args.limit is not None and kept >= args.limit:
-                    continue
-                if not first:
-                    out.write(",\n")
-                json.dump(obj, out, ensure_ascii=False)
-                first = False
-                kept += 1
-
-            if total % 50000 == 0:
-                print(f"Processed {total:,} records; kept {kept:,}", file=sys.stderr)
-
-        out.write("\n]\n")
+        for results in map_in_order(ex, classify_chunk, chunks, ahead=2 * workers):
+            for text in results:
+                total += 1
+                if text is not None:
+                    if args.limit is not None and kept >= args.limit:
+                        continue
+                    if not first:
+                        out.write(b",\n")
+                    out.write(text)
+                    first = False
+                    kept += 1
+
+                if total % 50000 == 0:
+                    print(f"Processed {total:,} records; kept {kept:,}", file=sys.stderr)
+
+        out.write(b"\n]\n")
 
     print(f"Done. Processed {total:,} records; kept {kept:,}.", file=sys.stderr)
     return 0
@@ -12,6 +12,12 @@ Supports:
   - JSON object with a list under a key, e.g. {"records":[...]} via --records-key
   - Time fields like "startTime", "endTime", or any ISO-8601-like string fields if --scan-all-times
 
+Optional:
+  - pip install orjson  -> faster per-record JSON parsing
+
+Records are parsed and tested in worker processes (one per CPU, less one for
+the reader); output keeps the input order.
+
 Time parsing:
   - Handles "Z" and "+/-HH:MM" offsets (e.g., 2021-12-19T06:00:00.000Z, 2010-06-18T17:37:31.100-04:00)
 """
@@ -20,10 +26,32 @@ from __future__ import annotations
 
 import argparse
 import json
+import os
+import re
 import sys
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
 from datetime import datetime, timezone
+from functools import partial
+from itertools import islice
 from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 
+from _streaming_json import iter_keyed_array, iter_top_level_array
+
+try:
+    import orjson
+except ImportError:  # optional: records are parsed with the json module instead
+    orjson = None
+
+json_loads = orjson.loads if orjson is not None else json.loads
+
+
+# Four digits opening a JSON string: where every timestamp's year is written
+YEAR_RE = re.compile(r'"\s*([0-9]{4})')
+
+# Records per worker task
+CHUNK_SIZE = 1000
+
 # ---- time parsing ----
 
 def parse_dt(s: str) -> Optional[datetime]:
@@ -33,6 +61,14 @@ def parse_dt(s: str) -> Optional[datetime]:
     """
     if not isinstance(s, str):
         return None
+
+    # Fast path for the usual "...Z" form: nothing to strip, and the result is already UTC
+    if s[-1:] == "Z" and s[:1].isdigit():
+        try:
+            return datetime.fromisoformat(s[:-1] + "+00:00")
+        except ValueError:
+            return None
+
     s = s.strip()
     if not s:
         return None
@@ -84,112 +120,28 @@ def extract_times(
 
 # ---- streaming JSON readers ----
 
-def iter_ndjson(fp) -> Iterator[Dict[str, Any]]:
+def iter_ndjson(fp) -> Iterator[str]:
+    """
+    Yield each non-empty line. Only the first is parsed here, to tell NDJSON from a
+    pretty-printed JSON object; the workers parse the rest.
+    """
+    checked = False
     for lineno, line in enumerate(fp, start=1):
         line = line.strip()
         if not line:
             continue
-        try:
-            obj = json.loads(line)
-        except json.JSONDecodeError as e:
-            raise RuntimeError(f"NDJSON parse error on line {lineno}: {e}") from e
-        if isinstance(obj, dict):
-            yield obj
-        else:
-            # Some NDJSON variants might store arrays per line; skip safely
-            continue
-
-
-def iter_top_level_array(fp) -> Iterator[Dict[str, Any]]:
-    """
-    Stream a top-level JSON array without loading it all.
-    Minimal character-level parser: reads one object at a time.
-
-    Assumes array elements are JSON objects.
-    """
-    # Read until '['
-    ch = fp.read(1)
-    while ch and ch.isspace():
-        ch = fp.read(1)
-    if ch != "[":
-        raise RuntimeError("Not a top-level JSON array (missing '[').")
-
-    buf = []
-    depth = 0
-    in_str = False
-    esc = False
-
-    # Read characters until we find objects {...}
-    while True:
-        ch = fp.read(1)
-        if not ch:
-            break
-
-        if in_str:
-            buf.append(ch)
-            if esc:
-                esc = False
-            elif ch == "\\":
-                esc = True
-            elif ch == '"':
-                in_str = False
-            continue
-
-        if ch.isspace() or ch == ",":
-            continue
-
-        if ch == '"':
-            # String outside an object (rare); ignore
-            in_str = True
-            buf.append(ch)
-            continue
-
-        if ch == "{":
-            # Start collecting an object
-            buf = ["{"]
-            depth = 1
-            in_str = False
-            esc = False
-
-            while depth > 0:
-                ch = fp.read(1)
-                if not ch:
-                    raise RuntimeError("Unexpected EOF while reading an object.")
-                buf.append(ch)
-
-                if in_str:
-                    if esc:
-                        esc = False
-                    elif ch == "\\":
-                        esc = True
-                    elif ch == '"':
-                        in_str = False
-                    continue
-
-                if ch == '"':
-                    in_str = True
-                elif ch == "{":
-                    depth += 1
-                elif ch == "}":
-                    depth -= 1
-
-            # We have a full JSON object in buf
-            raw = "".join(buf)
-            obj = json.loads(raw)
-            if isinstance(obj, dict):
-                yield obj
-            # After object ends, loop continues (skipping commas/whitespace/etc.)
-            continue
-
-        if ch == "]":
-            break
+        if not checked:
+            try:
+                json.loads(line)
+            except json.JSONDecodeError as e:
+                raise RuntimeError(f"NDJSON parse error on line {lineno}: {e}") from e
+            checked = True
+        yield line
 
-        # Ignore other tokens (numbers/null/etc.) at top-level if present
 
-
-def iter_json_records(fp, records_key: Optional[str]) -> Iterator[Dict[str, Any]]:
+def iter_json_records(fp, records_key: Optional[str]) -> Iterator[str]:
     """
-    Try NDJSON first. If it fails, fall back to streaming a top-level array.
+    Yields the JSON text of each record. Try NDJSON first. If it fails, fall back to streaming a top-level array.
     If records_key is provided, expects a top-level object with that key holding an array,
     and will stream that array by scanning until it finds '"records_key": [' then reading objects.
     """
@@ -226,96 +178,6 @@ def iter_json_records(fp, records_key: Optional[str]) -> Iterator[Dict[str, Any]
     raise RuntimeError("Unrecognized JSON format. Expected NDJSON, top-level array, or --records-key.")
 
 
-def iter_keyed_array(fp, key: str) -> Iterator[Dict[str, Any]]:
-    """
-    Stream objects from a JSON array stored under a top-level key.
-
-    This is a pragmatic scanner: it finds the substring '"<key>"' then the next '['
-    and then streams objects in that array like iter_top_level_array does, but starting
-    from that point.
-
-    Works for large files without loading all content.
-    """
-    needle = f'"{key}"'
-    window = ""
-    # Scan for the key
-    while True:
-        ch = fp.read(1)
-        if not ch:
-            raise RuntimeError(f"Could not find key {needle} in file.")
-        window = (window + ch)[-max(1024, len(needle) + 10):]
-        if needle in window:
-            break
-
-    # Now scan forward to the first '[' after the key
-    ch = fp.read(1)
-    while ch and ch != "[":
-        ch = fp.read(1)
-    if ch != "[":
-        raise RuntimeError(f"Found key {needle} but did not find '[' starting its array.")
-
-    # Now stream objects from this array
-    # Reuse the object-capture logic (similar to iter_top_level_array, but we are already inside the array)
-    buf = []
-    depth = 0
-    in_str = False
-    esc = False
-
-    while True:
-        ch = fp.read(1)
-        if not ch:
-            break
-
-        if in_str:
-            buf.append(ch)
-            if esc:
-                esc = False
-            elif ch == "\\":
-                esc = True
-            elif ch == '"':
-                in_str = False
-            continue
-
-        if ch.isspace() or ch == ",":
-            continue
-
-        if ch == "{":
-            buf = ["{"]
-            depth = 1
-            in_str = False
-            esc = False
-
-            while depth > 0:
-                ch = fp.read(1)
-                if not ch:
-                    raise RuntimeError("Unexpected EOF while reading an object.")
-                buf.append(ch)
-
-                if in_str:
-                    if esc:
-                        esc = False
-                    elif ch == "\\":
-                        esc = True
-                    elif ch == '"':
-                        in_str = False
-                    continue
-
-                if ch == '"':
-                    in_str = True
-                elif ch == "{":
-                    depth += 1
-                elif ch == "}":
-                    depth -= 1
-
-            obj = json.loads("".join(buf))
-            if isinstance(obj, dict):
-                yield obj
-            continue
-
-        if ch == "]":
-            break
-
-
 # ---- main operations ----
 
 def update_range(current: Optional[Tuple[datetime, datetime]], times: List[datetime]) -> Optional[Tuple[datetime, datetime]]:
@@ -328,20 +190,119 @@ def update_range(current: Optional[Tuple[datetime, datetime]], times: List[datet
     return (min(current[0], mn), max(current[1], mx))
 
 
-def in_range(times: List[datetime], start: Optional[datetime], end: Optional[datetime]) -> bool:
+def any_time_in_range(
+    obj: Dict[str, Any],
+    time_fields: List[str],
+    scan_all_times: bool,
+    start: Optional[datetime],
+    end: Optional[datetime],
+) -> bool:
     """
     Decide whether a record is in range.
-    If it has multiple times, we include it if ANY timestamp overlaps the requested window.
+    If it has multiple times, we include it if ANY timestamp overlaps the requested window,
+    i.e. one is no later than end and one is no earlier than start. Walks the same values
+    extract_times() would, but stops as soon as both are seen instead of collecting them.
     """
-    if not times:
-        return False
-    rec_min = min(times)
-    rec_max = max(times)
-    if start and rec_max < start:
-        return False
-    if end and rec_min > end:
+    seen_before_end = end is None
+    seen_after_start = start is None
+    values = obj.values() if scan_all_times else (obj.get(f) for f in time_fields)
+    for v in values:
+        dt = parse_dt(v)
+        if dt is None:
+            continue
+        if not seen_before_end and dt <= end:
+            seen_before_end = True
+        if not seen_after_start and dt >= start:
+            seen_after_start = True
+        if seen_before_end and seen_after_start:
+            return True
+    return False
+
+
+def scan_chunk(raws: List[str], time_fields: List[str], scan_all_times: bool) -> Tuple[int, List[datetime]]:
+    """Worker task: (records parsed, [earliest, latest] of their timestamps or [])."""
+    count = 0
+    chunk_range: Optional[Tuple[datetime, datetime]] = None
+    for raw in raws:
+        obj = json_loads(raw)
+        if not isinstance(obj, dict):
+            # Some NDJSON variants might store arrays per line; skip safely
+            continue
+        count += 1
+        chunk_range = update_range(chunk_range, extract_times(obj, time_fields, scan_all_times=scan_all_times))
+    return count, list(chunk_range or ())
+
+
+def year_bounds(start: Optional[datetime], end: Optional[datetime]) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Earliest/latest year (as 4-digit text) an in-range record's timestamps can be written
+    with; None for an open end. Padded a year each side: a local offset can put the
+    written year one off the UTC one.
+    """
+    lo = f"{start.year - 1:04d}" if start else None
+    hi = f"{min(end.year + 1, 9999):04d}" if end else None
+    return lo, hi
+
+
+def may_be_in_range(raw: str, lo: Optional[str], hi: Optional[str]) -> bool:
+    """
+    Cheap test on a record's raw text before parsing it. any_time_in_range() needs a
+    timestamp no later than the window's end and one no earlier than its start, and
+    every timestamp's year is the first thing in its JSON string. Text with escapes
+    is left to the real parser.
+    """
+    if "\\" in raw:
+        return True
+    years = YEAR_RE.findall(raw)
+    if not years:
         return False
-    return True
+    return (hi is None or min(years) <= hi) and (lo is None or max(years) >= lo)
+
+
+def export_chunk(
+    raws: List[str],
+    time_fields: List[str],
+    scan_all_times: bool,
+    start: Optional[datetime],
+    end: Optional[datetime],
+) -> List[Optional[bytes]]:
+    """
+    Worker task: per record, its UTF-8 JSON text if it is in range, else None. Kept
+    records are written exactly as they appear in the input, not re-serialized.
+    """
+    lo, hi = year_bounds(start, end)
+    out: List[Optional[bytes]] = []
+    for raw in raws:
+        if raw[:1] == "{" and not may_be_in_range(raw, lo, hi):
+            # Its years alone rule it out; skip the parse
+            out.append(None)
+            continue
+        obj = json_loads(raw)
+        if not isinstance(obj, dict):
+            continue
+        keep = any_time_in_range(obj, time_fields, scan_all_times, start, end)
+        out.append(raw.encode("utf-8") if keep else None)
+    return out
+
+
+def chunked(items: Iterable[str], size: int) -> Iterator[List[str]]:
+    it = iter(items)
+    while chunk := list(islice(it, size)):
+        yield chunk
+
+
+def map_in_order(ex: Executor, fn, items: Iterable[Any], ahead: int) -> Iterator[Any]:
+    """
+    Like ex.map(fn, items), but keeps at most `ahead` tasks in flight so a huge
+    input is never read far ahead of the workers. Results come back in input order.
+    """
+    pending: deque = deque()
+    for item in items:
+        pending.append(ex.submit(fn, item))
+        if len(pending) >= ahead:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
 
 
 def main() -> int:
@@ -381,14 +342,17 @@ def main() -> int:
         print("Error: export mode requires at least --from or --to", file=sys.stderr)
         return 2
 
-    with open(args.input, "r", encoding="utf-8") as fp:
-        records = iter_json_records(fp, args.records_key)
+    # The reader (this process) streams raw records to the workers in order
+    workers = max(1, (os.cpu_count() or 2) - 1)
+
+    with open(args.input, "r", encoding="utf-8") as fp, ProcessPoolExecutor(workers) as ex:
+        chunks = chunked(iter_json_records(fp, args.records_key), CHUNK_SIZE)
 
         if args.mode == "scan":
-            for obj in records:
-                total += 1
-                times = extract_times(obj, time_fields, scan_all_times=args.scan_all_times)
-                overall = update_range(overall, times)
+            task = partial(scan_chunk, time_fields=time_fields, scan_all_times=args.scan_all_times)
+            for count, chunk_times in map_in_order(ex, task, chunks, ahead=2 * workers):
+                total += count
+                overall = update_range(overall, chunk_times)
 
             if overall is None:
                 print("No parseable timestamps found.")
@@ -400,30 +364,31 @@ def main() -> int:
             return 0
 
         # export mode
-        with open(args.out, "w", encoding="utf-8") as out:
-            out.write("[\n")
+        # Binary with a 1 MiB buffer: records arrive as UTF-8 bytes, and small writes coalesce
+        with open(args.out, "wb", buffering=1 << 20) as out:
+            out.write(b"[\n")
             first_written = True
 
-            for obj in records:
-                total += 1
-                times = extract_times(obj, time_fields, scan_all_times=args.scan_all_times)
-                overall = update_range(overall, times)
-
-                if in_range(times, start, end):
+            # Records whose years rule them out are never parsed, so export mode does not
+            # report the file's overall date range (scan mode does)
+            task = partial(export_chunk, time_fields=time_fields, scan_all_times=args.scan_all_times,
+                           start=start, end=end)
+            for texts in map_in_order(ex, task, chunks, ahead=2 * workers):
+                for text in texts:
+                    total += 1
+                    if text is None:
+                        continue
                     if args.limit is not None and matched >= args.limit:
                         continue
                     if not first_written:
-                        out.write(",\n")
-                    json.dump(obj, out, ensure_ascii=False)
+                        out.write(b",\n")
+                    out.write(text)
                     first_written = False
                     matched += 1
 
-            out.write("\n]\n")
+            out.write(b"\n]\n")
 
-    if overall:
-        print(f"Records scanned: {total}")
-        print(f"Earliest (UTC): {overall[0].isoformat()}")
-        print(f"Latest   (UTC): {overall[1].isoformat()}")
+    print(f"Records scanned: {total}")
     print(f"Records exported: {matched}")
     print(f"Wrote: {args.out}")
     return 0